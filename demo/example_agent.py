@@ -8,6 +8,9 @@ import sys
 import os
 import time
 import random
+import hashlib
+import sqlite3
+from collections import OrderedDict
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -15,6 +18,68 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.sdk import AgentWatch
 
 
+# Exact-match response cache, persisted next to this script
+LLM_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.db")
+
+
+class LLMResponseCache:
+    """Exact-match LLM response cache: an in-memory LRU in front of a SQLite file."""
+    
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT)")
+    
+    @staticmethod
+    def key(model: str, prompt: str) -> str:
+        """Cache key for a model + prompt pair."""
+        return hashlib.sha256(f"{model}|{prompt}".encode()).hexdigest()
+    
+    def get(self, key: str) -> str | None:
+        """Look up a response, promoting disk hits into memory."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        row = self._db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._remember(key, row[0])
+            return row[0]
+        return None
+    
+    def set(self, key: str, response: str):
+        """Store a response in memory and on disk."""
+        self._remember(key, response)
+        self._db.execute("INSERT OR REPLACE INTO llm_cache (key, response) VALUES (?, ?)", (key, response))
+        self._db.commit()
+    
+    def _remember(self, key: str, response: str):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+llm_cache = LLMResponseCache()
+
+
+def cached_llm_call(model: str, prompt: str) -> tuple[str, int, int, bool]:
+    """
+    Call the LLM through the response cache.
+    
+    Returns (response, input_tokens, output_tokens, cached). Cache hits
+    cost nothing, so they report zero tokens.
+    """
+    key = llm_cache.key(model, prompt)
+    response = llm_cache.get(key)
+    if response is not None:
+        return response, 0, 0, True
+    
+    response, input_tokens, output_tokens = simulate_llm_call(prompt)
+    llm_cache.set(key, response)
+    return response, input_tokens, output_tokens, False
+
+
 def simulate_llm_call(prompt: str) -> tuple[str, int, int]:
     """Simulate an LLM API call."""
     time.sleep(random.uniform(0.5, 2.0))  # Simulate latency
@@ -58,12 +123,13 @@ class MyCustomerSupportAgent:
             try:
                 # Step 1: Analyze the message
                 analysis_prompt = f"Analyze customer intent: {message}"
-                _, input_tok, output_tok = simulate_llm_call(analysis_prompt)
+                _, input_tok, output_tok, cached = cached_llm_call("claude-3-5-sonnet", analysis_prompt)
                 span.log_llm_call(
                     model="claude-3-5-sonnet",
                     input_tokens=input_tok,
                     output_tokens=output_tok,
-                    duration_ms=1500
+                    duration_ms=0 if cached else 1500,
+                    cached=cached
                 )
                 
                 # Step 2: Search knowledge base (tool call)
@@ -88,12 +154,13 @@ class MyCustomerSupportAgent:
                 
                 # Step 4: Generate response
                 response_prompt = f"Generate helpful response for: {message}"
-                response, input_tok, output_tok = simulate_llm_call(response_prompt)
+                response, input_tok, output_tok, cached = cached_llm_call("claude-3-5-sonnet", response_prompt)
                 span.log_llm_call(
                     model="claude-3-5-sonnet",
                     input_tokens=input_tok,
                     output_tokens=output_tok,
-                    duration_ms=2000
+                    duration_ms=0 if cached else 2000,
+                    cached=cached
                 )
                 
                 # Mark success
@@ -6,6 +6,8 @@ Run this after starting the API server.
 """
 
 import asyncio
+import bisect
+import itertools
 import random
 import uuid
 from datetime import datetime, timedelta
@@ -13,6 +15,9 @@ import httpx
 
 API_URL = "http://localhost:8765"
 
+# Upper bound on in-flight requests to the API
+MAX_CONCURRENT_REQUESTS = 32
+
 # Demo agents
 AGENTS = [
     {"name": "Customer Support Agent", "type": "support", "owner": "Support Team"},
@@ -40,10 +45,20 @@ MODELS = [
 ]
 
 
-def weighted_choice(choices):
-    """Pick from weighted choices."""
+def cumulative_weights(choices):
+    """Precompute (items, cumulative weights) for weighted_choice."""
     items, weights = zip(*choices)
-    return random.choices(items, weights=weights)[0]
+    return items, list(itertools.accumulate(weights))
+
+
+# Built once, since the model mix is constant
+MODEL_CHOICES = cumulative_weights(MODELS)
+
+
+def weighted_choice(choices):
+    """Pick from precomputed cumulative weights."""
+    items, cum_weights = choices
+    return items[bisect.bisect(cum_weights, random.random() * cum_weights[-1])]
 
 
 async def create_agent(client: httpx.AsyncClient, agent_data: dict) -> str:
@@ -63,8 +78,18 @@ async def create_agent(client: httpx.AsyncClient, agent_data: dict) -> str:
     return str(uuid.uuid4())
 
 
-async def create_trace(client: httpx.AsyncClient, agent_id: str, agent_name: str) -> dict:
-    """Create a trace with events and costs."""
+def new_batch() -> dict:
+    """Create an empty bulk-ingest batch."""
+    return {"traces": [], "events": [], "compliance_events": []}
+
+
+def create_trace(batch: dict, agent_id: str, agent_name: str) -> dict:
+    """
+    Add a trace with its events to the batch.
+    
+    Returns the status update that completes the trace once the batch
+    has been ingested.
+    """
     task_type = random.choice(TASK_TYPES.get(agent_name, ["general_task"]))
     user_id = f"user_{random.randint(100, 999)}"
     
@@ -72,92 +97,100 @@ async def create_trace(client: httpx.AsyncClient, agent_id: str, agent_name: str
     is_success = random.random() < 0.90
     status = "success" if is_success else random.choice(["error", "timeout"])
     
-    # Create trace
-    response = await client.post(
-        f"{API_URL}/api/traces",
-        json={
-            "agent_id": agent_id,
-            "environment": random.choice(["production", "production", "production", "staging"]),
-            "user_id": user_id,
-            "session_id": f"session_{uuid.uuid4().hex[:8]}",
-            "task_type": task_type,
-            "input_summary": f"Process {task_type.replace('_', ' ')} request",
-            "attributes": {"priority": random.choice(["low", "medium", "high"])}
-        }
-    )
-    
-    if response.status_code != 200:
-        return None
-    
-    trace = response.json()
-    trace_id = trace["id"]
+    # Create trace (ID is assigned here so events in the same batch can reference it)
+    trace_id = str(uuid.uuid4())
+    batch["traces"].append({
+        "id": trace_id,
+        "agent_id": agent_id,
+        "environment": random.choice(["production", "production", "production", "staging"]),
+        "user_id": user_id,
+        "session_id": f"session_{uuid.uuid4().hex[:8]}",
+        "task_type": task_type,
+        "input_summary": f"Process {task_type.replace('_', ' ')} request",
+        "attributes": {"priority": random.choice(["low", "medium", "high"])}
+    })
     
     # Generate LLM calls (1-3 per trace)
     num_llm_calls = random.randint(1, 3)
-    total_cost = 0
     
     for i in range(num_llm_calls):
-        model = weighted_choice(MODELS)
+        model = weighted_choice(MODEL_CHOICES)
         input_tokens = random.randint(100, 2000)
         output_tokens = random.randint(50, 1500)
         duration = random.randint(500, 5000)
         
-        await client.post(
-            f"{API_URL}/api/events",
-            json={
-                "trace_id": trace_id,
-                "event_type": "llm_call",
-                "event_name": f"LLM Call {i+1}",
-                "model": model,
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens,
-                "duration_ms": duration,
-                "status": "success" if is_success or i < num_llm_calls - 1 else "error"
-            }
-        )
+        batch["events"].append({
+            "trace_id": trace_id,
+            "event_type": "llm_call",
+            "event_name": f"LLM Call {i+1}",
+            "model": model,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "duration_ms": duration,
+            "status": "success" if is_success or i < num_llm_calls - 1 else "error"
+        })
     
     # Maybe add tool calls
     if random.random() < 0.4:
         tools = ["web_search", "database_query", "file_read", "api_call", "calculator"]
         for _ in range(random.randint(1, 2)):
-            await client.post(
-                f"{API_URL}/api/events",
-                json={
-                    "trace_id": trace_id,
-                    "event_type": "tool_call",
-                    "event_name": random.choice(tools),
-                    "duration_ms": random.randint(50, 500),
-                    "status": "success"
-                }
-            )
+            batch["events"].append({
+                "trace_id": trace_id,
+                "event_type": "tool_call",
+                "event_name": random.choice(tools),
+                "duration_ms": random.randint(50, 500),
+                "status": "success"
+            })
     
     # Add compliance event for sensitive operations
     if random.random() < 0.3:
-        await client.post(
-            f"{API_URL}/api/compliance",
-            json={
-                "trace_id": trace_id,
-                "event_type": random.choice(["data_access", "pii_handling", "external_call"]),
-                "action": random.choice(["read", "process", "transmit"]),
-                "resource": random.choice(["customer_data", "financial_records", "user_profile"]),
-                "data_classification": random.choice(["internal", "confidential"]),
-                "justification": "Required for task completion",
-                "outcome": "allowed"
-            }
-        )
+        batch["compliance_events"].append({
+            "trace_id": trace_id,
+            "event_type": random.choice(["data_access", "pii_handling", "external_call"]),
+            "action": random.choice(["read", "process", "transmit"]),
+            "resource": random.choice(["customer_data", "financial_records", "user_profile"]),
+            "data_classification": random.choice(["internal", "confidential"]),
+            "justification": "Required for task completion",
+            "outcome": "allowed"
+        })
     
-    # Complete the trace
-    duration = random.randint(1000, 15000) if is_success else random.randint(500, 30000)
-    await client.patch(
-        f"{API_URL}/api/traces/{trace_id}",
-        json={
-            "status": status,
-            "error_message": "Timeout exceeded" if status == "timeout" else ("API error" if status == "error" else None),
-            "output_summary": "Task completed successfully" if is_success else "Task failed"
-        }
-    )
+    return {
+        "trace_id": trace_id,
+        "status": status,
+        "error_message": "Timeout exceeded" if status == "timeout" else ("API error" if status == "error" else None),
+        "output_summary": "Task completed successfully" if is_success else "Task failed"
+    }
+
+
+async def bounded(sem: asyncio.Semaphore, coro):
+    """Await a request while holding a slot in the semaphore."""
+    async with sem:
+        return await coro
+
+
+async def send_batch(client: httpx.AsyncClient, sem: asyncio.Semaphore, batch: dict, completions: list) -> int:
+    """Ingest a batch in one request, then complete its traces concurrently."""
+    response = await bounded(sem, client.post(f"{API_URL}/api/ingest", json=batch))
+    if response.status_code != 200:
+        return 0
     
-    return trace
+    await asyncio.gather(*(
+        bounded(sem, client.patch(f"{API_URL}/api/traces/{update.pop('trace_id')}", json=update))
+        for update in completions
+    ))
+    
+    return len(batch["traces"])
+
+
+def generate_hour(agent_ids: dict) -> tuple:
+    """Generate one hour of traces (0-5 per agent) as a single batch."""
+    batch = new_batch()
+    completions = []
+    for agent_name, agent_id in agent_ids.items():
+        num_traces = random.randint(0, 5)
+        for _ in range(num_traces):
+            completions.append(create_trace(batch, agent_id, agent_name))
+    return batch, completions
 
 
 async def create_alert(client: httpx.AsyncClient, agent_ids: list):
@@ -178,7 +211,8 @@ async def main():
     print("AgentWatch Demo Data Generator")
     print("=" * 50)
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    limits = httpx.Limits(max_keepalive_connections=64, max_connections=64, keepalive_expiry=60.0)
+    async with httpx.AsyncClient(timeout=30.0, limits=limits) as client:
         # Check API is running
         try:
             response = await client.get(f"{API_URL}/health")
@@ -203,17 +237,15 @@ async def main():
         # Generate traces (simulate last 7 days of activity)
         print("\nGenerating traces...")
         total_traces = 0
+        sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
         
-        for hours_ago in range(168, 0, -1):  # Last 7 days, hourly
-            # Generate 0-5 traces per hour per agent
-            for agent_name, agent_id in agent_ids.items():
-                num_traces = random.randint(0, 5)
-                for _ in range(num_traces):
-                    await create_trace(client, agent_id, agent_name)
-                    total_traces += 1
-            
-            if hours_ago % 24 == 0:
-                print(f"   Day -{hours_ago // 24}: {total_traces} traces generated")
+        for days_ago in range(7, 0, -1):  # Last 7 days, one batch per hour
+            hours = [generate_hour(agent_ids) for _ in range(24)]
+            sent = await asyncio.gather(*(
+                send_batch(client, sem, batch, completions) for batch, completions in hours
+            ))
+            total_traces += sum(sent)
+            print(f"   Day -{days_ago}: {total_traces} traces generated")
         
         print(f"   [OK] Total: {total_traces} traces")
         
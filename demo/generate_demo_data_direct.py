@@ -0,0 +1,145 @@
+"""
+AgentWatch Demo Data Generator (in-process)
+
+Generates the same demo data as generate_demo_data.py, but writes it
+straight to the database through SQLAlchemy instead of going through the
+API. Much faster for bootstrapping a demo; the API server does not need
+to be running.
+
+Uses the same DATABASE_URL as the API.
+"""
+
+import sys
+import os
+import asyncio
+import random
+import uuid
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.api.database import engine, async_session_factory, init_db
+from src.api.models import Agent, Trace, Event, Cost, ComplianceEvent, Alert
+from src.api.pricing import calculate_cost
+from generate_demo_data import AGENTS, generate_hour
+
+# Rows written per transaction
+COMMIT_BATCH_SIZE = 500
+
+
+def build_rows(batch: dict, completions: list, now: datetime) -> list:
+    """Turn one generated batch into completed ORM rows."""
+    rows = []
+    completed = {update["trace_id"]: update for update in completions}
+
+    for trace in batch["traces"]:
+        update = completed[trace["id"]]
+        duration_ms = random.randint(500, 15000)
+        rows.append(Trace(
+            **trace,
+            started_at=now,
+            ended_at=now + timedelta(milliseconds=duration_ms),
+            duration_ms=duration_ms,
+            status=update["status"],
+            error_message=update["error_message"],
+            output_summary=update["output_summary"]
+        ))
+
+    for event in batch["events"]:
+        rows.append(Event(id=uuid.uuid4().hex, timestamp=now, **event))
+        if event["event_type"] == "llm_call":
+            rows.append(Cost(
+                id=uuid.uuid4().hex,
+                trace_id=event["trace_id"],
+                timestamp=now,
+                amount=calculate_cost(event["model"], event["input_tokens"], event["output_tokens"]),
+                currency="USD",
+                category="llm",
+                model=event["model"],
+                input_tokens=event["input_tokens"],
+                output_tokens=event["output_tokens"]
+            ))
+
+    for event in batch["compliance_events"]:
+        rows.append(ComplianceEvent(id=uuid.uuid4().hex, timestamp=now, **event))
+
+    return rows
+
+
+def build_alerts(agent_ids: list, now: datetime) -> list:
+    """Build some demo alerts."""
+    alerts = [
+        {"title": "High error rate detected", "severity": "error", "alert_type": "error_spike", "description": "Error rate exceeded 10% threshold"},
+        {"title": "Cost spike warning", "severity": "warning", "alert_type": "cost_spike", "description": "Hourly cost 50% above baseline"},
+        {"title": "Unusual activity pattern", "severity": "info", "alert_type": "anomaly", "description": "Agent behavior deviation detected"},
+    ]
+    return [
+        Alert(id=str(uuid.uuid4()), timestamp=now, agent_id=random.choice(agent_ids), **alert)
+        for alert in random.sample(alerts, k=random.randint(1, len(alerts)))
+    ]
+
+
+async def write_rows(rows: list):
+    """Write rows in transactions of COMMIT_BATCH_SIZE."""
+    for i in range(0, len(rows), COMMIT_BATCH_SIZE):
+        async with async_session_factory() as session:
+            session.add_all(rows[i:i + COMMIT_BATCH_SIZE])
+            await session.commit()
+
+
+async def main():
+    """Generate demo data."""
+    print("AgentWatch Demo Data Generator (in-process)")
+    print("=" * 50)
+
+    await init_db()
+    now = datetime.utcnow()
+
+    # Create agents
+    print("\nCreating agents...")
+    agents = [
+        Agent(
+            id=str(uuid.uuid4()),
+            name=agent["name"],
+            description=f"Demo {agent['type']} agent",
+            agent_type=agent["type"],
+            owner=agent["owner"],
+            config={"demo": True}
+        )
+        for agent in AGENTS
+    ]
+    await write_rows(agents)
+    agent_ids = {agent.name: agent.id for agent in agents}
+    for agent in agents:
+        print(f"   [+] {agent.name}")
+
+    # Generate traces (simulate last 7 days of activity)
+    print("\nGenerating traces...")
+    total_traces = 0
+
+    for days_ago in range(7, 0, -1):  # Last 7 days, one batch per hour
+        rows = []
+        for _ in range(24):
+            batch, completions = generate_hour(agent_ids)
+            rows.extend(build_rows(batch, completions, now))
+            total_traces += len(batch["traces"])
+        await write_rows(rows)
+        print(f"   Day -{days_ago}: {total_traces} traces generated")
+
+    print(f"   [OK] Total: {total_traces} traces")
+
+    # Create some alerts
+    print("\nCreating sample alerts...")
+    await write_rows(build_alerts(list(agent_ids.values()), now))
+    print("   [OK] Alerts created")
+
+    await engine.dispose()
+
+    print("\n" + "=" * 50)
+    print("[DONE] Demo data generation complete!")
+    print("\nView the dashboard at: http://localhost:8766")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,20 +5,42 @@ AgentWatch Quick Start
 Run this to start both the API and dashboard servers.
 """
 
+import asyncio
 import subprocess
 import sys
 import os
-import time
-import threading
 import webbrowser
 
-def run_api():
-    """Run the API server."""
-    subprocess.run([sys.executable, "-m", "src.api.main"], cwd=os.path.dirname(__file__))
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def run_dashboard():
-    """Run the dashboard server."""
-    subprocess.run([sys.executable, "-m", "src.dashboard.serve"], cwd=os.path.dirname(__file__))
+async def start_server(module: str) -> asyncio.subprocess.Process:
+    """Start a server module as a child process."""
+    return await asyncio.create_subprocess_exec(sys.executable, "-m", module, cwd=ROOT_DIR)
+
+async def run_servers():
+    """Run the API and dashboard servers until they exit or we are interrupted."""
+    procs = []
+    try:
+        procs.append(await start_server("src.api.main"))
+        
+        # Wait for API to start
+        await asyncio.sleep(2)
+        
+        procs.append(await start_server("src.dashboard.serve"))
+        
+        # Wait a moment then open browser
+        await asyncio.sleep(2)
+        try:
+            webbrowser.open("http://localhost:8766")
+        except:
+            pass
+        
+        await asyncio.gather(*(p.wait() for p in procs))
+    finally:
+        for p in procs:
+            if p.returncode is None:
+                p.terminate()
+                await p.wait()
 
 def main():
     print("""
@@ -31,7 +53,7 @@ def main():
     
     # Initialize database first
     print("📦 Initializing database...")
-    subprocess.run([sys.executable, "-m", "src.api.init_db"], cwd=os.path.dirname(__file__))
+    subprocess.run([sys.executable, "-m", "src.api.init_db"], cwd=ROOT_DIR)
     
     print("\n🚀 Starting servers...")
     print("   API:       http://localhost:8765")
@@ -39,28 +61,8 @@ def main():
     print("   API Docs:  http://localhost:8765/docs")
     print("\n   Press Ctrl+C to stop\n")
     
-    # Start API in background thread
-    api_thread = threading.Thread(target=run_api, daemon=True)
-    api_thread.start()
-    
-    # Wait for API to start
-    time.sleep(2)
-    
-    # Start dashboard in background thread
-    dashboard_thread = threading.Thread(target=run_dashboard, daemon=True)
-    dashboard_thread.start()
-    
-    # Wait a moment then open browser
-    time.sleep(2)
-    try:
-        webbrowser.open("http://localhost:8766")
-    except:
-        pass
-    
-    # Keep main thread alive
     try:
-        while True:
-            time.sleep(1)
+        asyncio.run(run_servers())
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down AgentWatch...")
         sys.exit(0)
@@ -0,0 +1,39 @@
+"""
+AgentWatch Response Cache
+
+Small in-process TTL cache for dashboard queries that are polled far more
+often than their results change.
+"""
+
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Dict-backed cache whose entries expire `ttl_s` seconds after being set."""
+
+    def __init__(self, ttl_s: float, maxsize: int = 256):
+        self.ttl_s = ttl_s
+        self.maxsize = maxsize
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Cache a value, evicting the oldest entry when full."""
+        if key not in self._entries and len(self._entries) >= self.maxsize:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = (time.monotonic() + self.ttl_s, value)
+
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
@@ -5,6 +5,8 @@ Async SQLAlchemy setup for SQLite (MVP) with easy migration to PostgreSQL.
 """
 
 import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from .models import Base
@@ -12,13 +14,52 @@ from .models import Base
 # Database URL - SQLite for MVP, easy to swap to PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./agentwatch.db")
 
+# Connection pool - sized for bursts of concurrent requests, and failing
+# fast instead of queueing for 30s when exhausted
+ENGINE_OPTIONS = {}
+_url = make_url(DATABASE_URL)
+if _url.get_backend_name() != "sqlite" or _url.database not in (None, "", ":memory:"):
+    # In-memory SQLite runs on a single static connection instead
+    ENGINE_OPTIONS.update(pool_size=20, max_overflow=10, pool_timeout=5)
+if _url.get_backend_name() != "sqlite":
+    # Network databases drop idle connections; check and recycle them
+    ENGINE_OPTIONS.update(pool_pre_ping=True, pool_recycle=3600)
+if _url.get_driver_name() == "asyncpg":
+    # Short dashboard queries gain nothing from JIT, and repeated statements
+    # reuse server-side prepared statements
+    ENGINE_OPTIONS["connect_args"] = {
+        "server_settings": {"jit": "off"},
+        "prepared_statement_cache_size": 1024
+    }
+
 # Create async engine
 engine = create_async_engine(
     DATABASE_URL,
     echo=os.getenv("SQL_DEBUG", "").lower() == "true",
-    future=True
+    future=True,
+    **ENGINE_OPTIONS
+)
+
+# SQLite tuning - WAL lets readers run alongside the writer, and NORMAL
+# sync only fsyncs at checkpoints instead of on every commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA cache_size=-65536",  # 64 MB
+    "PRAGMA busy_timeout=5000",
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Apply SQLite pragmas to every new connection."""
+        cursor = dbapi_connection.cursor()
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
 # Session factory
 async_session_factory = async_sessionmaker(
     engine,
@@ -41,13 +82,12 @@ async def get_session() -> AsyncSession:
 
 # Dependency for FastAPI
 async def get_db():
-    """FastAPI dependency for database sessions."""
-    async with async_session_factory() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+    """
+    FastAPI dependency for database sessions.
+    
+    Each request runs in one transaction: COMMIT on success, ROLLBACK if
+    the endpoint raises. Endpoints don't flush; pending changes go out with
+    the commit.
+    """
+    async with async_session_factory.begin() as session:
+        yield session
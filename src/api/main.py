@@ -6,20 +6,34 @@ FastAPI application for agent telemetry ingestion and analytics.
 
 import os
 import uuid
+import time
+import zlib
+import hashlib
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional, List
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy.exc import SQLAlchemyError
+from pydantic import ValidationError
+import orjson
+from sqlalchemy import select, insert, update, func, and_, desc, tuple_, type_coerce, lambda_stmt, JSON, Uuid
 
 from .database import init_db, get_db, engine
 from .models import Agent, Trace, Event, Cost, ComplianceEvent, Alert, AggregatedMetrics
+from .cache import TTLCache
+from .pricing import calculate_cost, calculate_costs
+from .rollup import (
+    COST_BUCKET, TRACE_BUCKET, bucket_expr,
+    rollup_loop, rollup_mark, rolled_range, raw_condition, rollup_condition, mark_late_traces
+)
 from .schemas import (
     AgentCreate, AgentResponse,
     TraceCreate, TraceUpdate, TraceResponse,
@@ -28,39 +42,293 @@ from .schemas import (
     ComplianceEventCreate, ComplianceEventResponse,
     AlertCreate, AlertResponse,
     MetricsSummary, AgentMetrics, TimeSeriesPoint, CostBreakdown, DashboardData,
-    BulkIngestRequest, BulkIngestResponse,
+    BulkIngestRequest, BulkIngestResponse, TraceCompletion,
     TraceStatus
 )
 
 
-# Model pricing (cost per 1K tokens)
-MODEL_PRICING = {
-    "claude-3-opus": {"input": 0.015, "output": 0.075},
-    "claude-3-sonnet": {"input": 0.003, "output": 0.015},
-    "claude-3-haiku": {"input": 0.00025, "output": 0.00125},
-    "claude-3-5-sonnet": {"input": 0.003, "output": 0.015},
-    "gpt-4": {"input": 0.03, "output": 0.06},
-    "gpt-4-turbo": {"input": 0.01, "output": 0.03},
-    "gpt-4o": {"input": 0.005, "output": 0.015},
-    "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
-    "gemini-pro": {"input": 0.00025, "output": 0.0005},
-    "gemini-1.5-pro": {"input": 0.00125, "output": 0.005},
-}
+# Fraction of traces whose non-error events are stored (1.0 keeps everything).
+# Errors are always kept, and traces and costs are never sampled, so counts,
+# success rates and spend stay exact.
+SAMPLING_RATE = float(os.getenv("SAMPLING_RATE", "1.0"))
+
+
+def is_sampled(trace_id: str) -> bool:
+    """Deterministic per-trace sampling decision, so a trace keeps all or none of its events."""
+    if SAMPLING_RATE >= 1.0:
+        return True
+    return zlib.crc32(trace_id.encode()) / 2**32 < SAMPLING_RATE
+
+
+def keep_event(event: EventCreate) -> bool:
+    """Whether an incoming event should be stored."""
+    return event.status == "error" or event.event_type == "error" or is_sampled(event.trace_id)
+
+
+def response_columns(model, schema) -> list:
+    """The table columns a response schema serialises, in schema order."""
+    return [model.__table__.c[name] for name in schema.model_fields]
+
+
+# Base statements for the list endpoints. Filters are appended as lambdas,
+# so SQLAlchemy builds and compiles each filter combination once and later
+# requests only bind new parameter values. They select just the response
+# columns and return plain row mappings, skipping ORM hydration.
+_AGENT_COLUMNS = response_columns(Agent, AgentResponse)
+_TRACE_COLUMNS = response_columns(Trace, TraceResponse)
+_EVENT_COLUMNS = response_columns(Event, EventResponse)
+_COST_COLUMNS = response_columns(Cost, CostResponse)
+_COMPLIANCE_EVENT_COLUMNS = response_columns(ComplianceEvent, ComplianceEventResponse)
+_ALERT_COLUMNS = response_columns(Alert, AlertResponse)
+
+_LIST_TRACES = lambda_stmt(lambda: select(*_TRACE_COLUMNS))
+_LIST_COMPLIANCE_EVENTS = lambda_stmt(lambda: select(*_COMPLIANCE_EVENT_COLUMNS))
+_LIST_ALERTS = lambda_stmt(lambda: select(*_ALERT_COLUMNS))
+
+
+# Dashboards poll the cost summary; identical queries are served from here
+COST_SUMMARY_CACHE_TTL_S = 30
+_cost_summary_cache = TTLCache(ttl_s=COST_SUMMARY_CACHE_TTL_S)
+
+# Every open dashboard (and the dashboard server's poller) asks for the same
+# snapshot; it is built at most once per TTL
+DASHBOARD_CACHE_TTL_S = 3
+_dashboard_cache = TTLCache(ttl_s=DASHBOARD_CACHE_TTL_S, maxsize=1)
+
+# Analytics responses may be reused briefly, then revalidated with their ETag
+ANALYTICS_CACHE_CONTROL = "max-age=5, stale-while-revalidate=30"
+ANALYTICS_PATHS = ("/api/analytics/", "/api/dashboard")
+
+
+def is_uuid(value: str) -> bool:
+    """
+    Whether `value` parses as a UUID.
+    
+    Generated IDs are stored in UUID columns, so anything else cannot match a
+    row (and PostgreSQL rejects it outright rather than finding nothing).
+    """
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+async def insert_returning(db: AsyncSession, model, row: dict, columns: list):
+    """
+    Insert one row and return its response columns.
+    
+    A single INSERT ... RETURNING replaces add() + flush() and the ORM
+    bookkeeping around it, and picks up column defaults the response needs.
+    """
+    result = await db.execute(insert(model).values(**row).returning(*columns))
+    return result.mappings().one()
+
+
+def json_rows(rows, headers: Optional[dict] = None) -> Response:
+    """
+    Serialise response-shaped row mappings straight to JSON.
+    
+    The rows already hold exactly the response schema's columns, so this
+    skips FastAPI's per-row validation into pydantic models and dump back to
+    dicts; orjson encodes the datetimes and strings directly. The route's
+    response_model still documents the shape.
+    """
+    return Response(orjson.dumps([dict(row) for row in rows]), media_type="application/json", headers=headers)
+
+
+# Rows fetched per round trip when streaming a list response
+STREAM_BATCH_SIZE = 200
+
+
+async def stream_rows(db: AsyncSession, stmt) -> StreamingResponse:
+    """
+    Stream a statement's rows as a JSON array.
+    
+    Rows are fetched STREAM_BATCH_SIZE at a time and serialised as they
+    arrive, so peak memory is one batch rather than the whole page, and the
+    client can start parsing before the last row is read.
+    
+    The query runs and its first batch is fetched before the response is
+    returned, so a failing query still gets a 500. A failure after that
+    raises out of the body, aborting the connection instead of ending a
+    truncated array that parses. Rows are read in the request session,
+    which get_db keeps open until the response has been sent.
+    """
+    result = await db.stream(stmt, execution_options={"yield_per": STREAM_BATCH_SIZE})
+    rows = result.mappings()
+    
+    async def body(batch):
+        yield b"["
+        separator = b""
+        while batch:
+            yield separator + b",".join([orjson.dumps(dict(row)) for row in batch])
+            separator = b","
+            batch = await rows.fetchmany(STREAM_BATCH_SIZE)
+        yield b"]"
+    
+    return StreamingResponse(body(await rows.fetchmany(STREAM_BATCH_SIZE)), media_type="application/json")
+
+
+# ============================================================================
+# Row Builders (shared by the single-record and bulk ingest endpoints)
+# ============================================================================
+
+# Rows are plain column dicts: single-record endpoints wrap them in ORM
+# objects, bulk ingest hands them straight to a Core executemany INSERT.
+# Callers capture `now` once per request, so every row in a batch shares one
+# timestamp instead of reading the clock per row, and bulk callers pass IDs
+# from new_ids() instead of generating one per row.
+
+def new_ids(n: int) -> List[str]:
+    """`n` random (version 4) UUIDs as hex, from a single urandom read."""
+    rand = os.urandom(16 * n)
+    return [uuid.UUID(bytes=rand[i:i + 16], version=4).hex for i in range(0, 16 * n, 16)]
 
 
-def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
-    """Calculate cost based on model and token counts."""
-    pricing = MODEL_PRICING.get(model, {"input": 0.001, "output": 0.002})
-    input_cost = (input_tokens / 1000) * pricing["input"]
-    output_cost = (output_tokens / 1000) * pricing["output"]
-    return round(input_cost + output_cost, 6)
+def trace_row(trace: TraceCreate, now: datetime, row_id: Optional[str] = None) -> dict:
+    """Build a running trace row from a create request."""
+    return dict(
+        id=trace.id or row_id or uuid.uuid4().hex,
+        agent_id=trace.agent_id,
+        parent_trace_id=trace.parent_trace_id,
+        started_at=trace.started_at or now,
+        environment=trace.environment,
+        user_id=trace.user_id,
+        session_id=trace.session_id,
+        task_type=trace.task_type,
+        input_summary=trace.input_summary,
+        attributes=trace.attributes,
+        status="running"
+    )
+
+
+def event_row(event: EventCreate, now: datetime, row_id: Optional[str] = None) -> dict:
+    """Build an event row from a create request."""
+    return dict(
+        id=row_id or uuid.uuid4().hex,
+        trace_id=event.trace_id,
+        timestamp=now,
+        event_type=event.event_type,
+        event_name=event.event_name,
+        input_data=event.input_data,
+        output_data=event.output_data,
+        duration_ms=event.duration_ms,
+        status=event.status,
+        model=event.model,
+        input_tokens=event.input_tokens,
+        output_tokens=event.output_tokens,
+        attributes=event.attributes
+    )
+
+
+def has_llm_cost(event: EventCreate) -> bool:
+    """
+    Whether an event is an LLM call that should be priced automatically.
+    
+    Calls without a model or with no billable tokens (cache hits, free tiers,
+    missing or bogus counts) get no cost row.
+    """
+    return (
+        event.event_type == "llm_call"
+        and bool(event.model)
+        and (event.input_tokens or 0) > 0
+        and (event.output_tokens or 0) > 0
+    )
+
+
+def llm_cost_row(
+    event: EventCreate,
+    now: datetime,
+    amount: Optional[float] = None,
+    row_id: Optional[str] = None
+) -> dict:
+    """Build the automatic cost row for an LLM call event."""
+    if amount is None:
+        amount = calculate_cost(event.model, event.input_tokens, event.output_tokens)
+    return dict(
+        id=row_id or uuid.uuid4().hex,
+        trace_id=event.trace_id,
+        timestamp=now,
+        amount=amount,
+        currency="USD",
+        category="llm",
+        model=event.model,
+        input_tokens=event.input_tokens,
+        output_tokens=event.output_tokens
+    )
+
+
+def cost_row(cost: CostCreate, now: datetime, row_id: Optional[str] = None) -> dict:
+    """Build a cost row from a create request."""
+    return dict(
+        id=row_id or uuid.uuid4().hex,
+        trace_id=cost.trace_id,
+        timestamp=now,
+        amount=cost.amount,
+        currency=cost.currency,
+        category=cost.category,
+        subcategory=cost.subcategory,
+        model=cost.model,
+        input_tokens=cost.input_tokens,
+        output_tokens=cost.output_tokens,
+        customer_id=cost.customer_id,
+        team_id=cost.team_id
+    )
+
+
+def compliance_event_row(event: ComplianceEventCreate, now: datetime, row_id: Optional[str] = None) -> dict:
+    """Build a compliance event row from a create request."""
+    return dict(
+        id=row_id or uuid.uuid4().hex,
+        trace_id=event.trace_id,
+        timestamp=now,
+        event_type=event.event_type,
+        action=event.action,
+        resource=event.resource,
+        resource_type=event.resource_type,
+        justification=event.justification,
+        data_classification=event.data_classification,
+        actor_type=event.actor_type,
+        actor_id=event.actor_id,
+        outcome=event.outcome,
+        request_data=event.request_data,
+        response_data=event.response_data
+    )
+
+
+def apply_trace_update(trace: Trace, trace_update: TraceUpdate):
+    """Apply an update/completion request to a trace row."""
+    if trace_update.status:
+        trace.status = trace_update.status
+        if trace_update.status in [TraceStatus.SUCCESS, TraceStatus.ERROR, TraceStatus.TIMEOUT]:
+            if trace_update.duration_ms is not None and trace.started_at:
+                trace.duration_ms = trace_update.duration_ms
+                trace.ended_at = trace.started_at + timedelta(milliseconds=trace_update.duration_ms)
+            else:
+                trace.ended_at = datetime.utcnow()
+                if trace.started_at:
+                    trace.duration_ms = int((trace.ended_at - trace.started_at).total_seconds() * 1000)
+    
+    if trace_update.error_message:
+        trace.error_message = trace_update.error_message
+    if trace_update.error_type:
+        trace.error_type = trace_update.error_type
+    if trace_update.output_summary:
+        trace.output_summary = trace_update.output_summary
+    if trace_update.attributes:
+        # Attributes created as a non-object JSON value are replaced, not merged
+        existing = trace.attributes if isinstance(trace.attributes, dict) else {}
+        trace.attributes = {**existing, **trace_update.attributes}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
     await init_db()
+    rollup_task = asyncio.create_task(rollup_loop())
     yield
+    rollup_task.cancel()
     await engine.dispose()
 
 
@@ -72,24 +340,100 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# CORS middleware
+# CORS middleware - explicit origins (comma-separated CORS_ORIGINS, the
+# dashboard by default), with preflight responses cached for a day
+CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:8766,http://127.0.0.1:8766").split(",")
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PATCH"],
+    allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+    expose_headers=["X-Next-Before", "X-Next-Before-Id", "ETag"],
+    max_age=86400,
 )
 
 
+class AnalyticsETagMiddleware:
+    """
+    Tag analytics responses with a weak ETag over their body.
+    
+    A poll whose If-None-Match still matches gets a bodyless 304, so clients
+    skip re-downloading and re-rendering aggregates that have not changed.
+    Plain ASGI rather than @app.middleware("http"): every other request,
+    ingest included, is passed straight through after a path check instead
+    of paying for a wrapped request and streamed response.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not scope["path"].startswith(ANALYTICS_PATHS)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        start = None
+        chunks = []
+        
+        async def buffered_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self.send_tagged(scope, start, b"".join(chunks), send)
+            else:
+                await send(message)
+        
+        await self.app(scope, receive, buffered_send)
+    
+    @staticmethod
+    async def send_tagged(scope, start, body: bytes, send):
+        """Send a buffered response, tagged (or as a 304) if it is a 200."""
+        if start["status"] == 200:
+            headers = MutableHeaders(scope=start)
+            headers["ETag"] = f'W/"{hashlib.md5(body).hexdigest()}"'
+            headers["Cache-Control"] = ANALYTICS_CACHE_CONTROL
+            if Headers(scope=scope).get("if-none-match") == headers["ETag"]:
+                del headers["content-length"]
+                del headers["content-type"]
+                start = {**start, "status": 304}
+                body = b""
+        await send(start)
+        await send({"type": "http.response.body", "body": body})
+
+
+app.add_middleware(AnalyticsETagMiddleware)
+
+
 # ============================================================================
 # Health Check
 # ============================================================================
 
+# Load balancers poll /health aggressively; its timestamp is refreshed at
+# most once a second
+_health_timestamp = [0.0, ""]
+
+
+def health_timestamp() -> str:
+    """Current UTC time as ISO 8601, cached for one second."""
+    now = time.monotonic()
+    if now - _health_timestamp[0] >= 1.0:
+        _health_timestamp[:] = [now, datetime.utcnow().isoformat()]
+    return _health_timestamp[1]
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": health_timestamp()}
 
 
 @app.get("/")
@@ -110,17 +454,19 @@ async def root():
 @app.post("/api/agents", response_model=AgentResponse)
 async def create_agent(agent: AgentCreate, db: AsyncSession = Depends(get_db)):
     """Register a new agent."""
-    db_agent = Agent(
-        id=str(uuid.uuid4()),
+    if agent.id:
+        existing = await db.get(Agent, agent.id)
+        if existing:
+            return existing
+    row = dict(
+        id=agent.id or str(uuid.uuid4()),
         name=agent.name,
         description=agent.description,
         agent_type=agent.agent_type,
         owner=agent.owner,
         config=agent.config
     )
-    db.add(db_agent)
-    await db.flush()
-    return db_agent
+    return await insert_returning(db, Agent, row, _AGENT_COLUMNS)
 
 
 @app.get("/api/agents", response_model=List[AgentResponse])
@@ -153,22 +499,9 @@ async def get_agent(agent_id: str, db: AsyncSession = Depends(get_db)):
 @app.post("/api/traces", response_model=TraceResponse)
 async def create_trace(trace: TraceCreate, db: AsyncSession = Depends(get_db)):
     """Start a new trace."""
-    db_trace = Trace(
-        id=str(uuid.uuid4()),
-        agent_id=trace.agent_id,
-        parent_trace_id=trace.parent_trace_id,
-        started_at=datetime.utcnow(),
-        environment=trace.environment,
-        user_id=trace.user_id,
-        session_id=trace.session_id,
-        task_type=trace.task_type,
-        input_summary=trace.input_summary,
-        attributes=trace.attributes,
-        status="running"
-    )
-    db.add(db_trace)
-    await db.flush()
-    return db_trace
+    row = trace_row(trace, datetime.utcnow())
+    await mark_late_traces(db, [row["started_at"]])
+    return await insert_returning(db, Trace, row, _TRACE_COLUMNS)
 
 
 @app.patch("/api/traces/{trace_id}", response_model=TraceResponse)
@@ -178,28 +511,15 @@ async def update_trace(
     db: AsyncSession = Depends(get_db)
 ):
     """Update/complete a trace."""
-    result = await db.execute(select(Trace).where(Trace.id == trace_id))
-    trace = result.scalar_one_or_none()
+    trace = await db.get(Trace, trace_id) if is_uuid(trace_id) else None
     if not trace:
         raise HTTPException(status_code=404, detail="Trace not found")
     
+    apply_trace_update(trace, trace_update)
     if trace_update.status:
-        trace.status = trace_update.status.value
-        if trace_update.status in [TraceStatus.SUCCESS, TraceStatus.ERROR, TraceStatus.TIMEOUT]:
-            trace.ended_at = datetime.utcnow()
-            if trace.started_at:
-                trace.duration_ms = int((trace.ended_at - trace.started_at).total_seconds() * 1000)
+        await mark_late_traces(db, [trace.started_at])
     
-    if trace_update.error_message:
-        trace.error_message = trace_update.error_message
-    if trace_update.error_type:
-        trace.error_type = trace_update.error_type
-    if trace_update.output_summary:
-        trace.output_summary = trace_update.output_summary
-    if trace_update.attributes:
-        trace.attributes = {**(trace.attributes or {}), **trace_update.attributes}
-    
-    await db.flush()
+    # Written by the commit that ends the request
     return trace
 
 
@@ -209,40 +529,53 @@ async def list_traces(
     status: Optional[str] = None,
     environment: Optional[str] = None,
     since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+    before_id: Optional[str] = None,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db)
 ):
-    """List traces with optional filters."""
-    query = select(Trace)
+    """
+    List traces with optional filters, newest first.
     
-    conditions = []
+    Page with the keyset cursor rather than `skip`: pass the X-Next-Before and
+    X-Next-Before-Id headers of a full page back as `before`/`before_id`.
+    """
+    stmt = _LIST_TRACES
     if agent_id:
-        conditions.append(Trace.agent_id == agent_id)
+        stmt += lambda s: s.where(Trace.agent_id == agent_id)
     if status:
-        conditions.append(Trace.status == status)
+        stmt += lambda s: s.where(Trace.status == status)
     if environment:
-        conditions.append(Trace.environment == environment)
+        stmt += lambda s: s.where(Trace.environment == environment)
     if since:
-        conditions.append(Trace.started_at >= since)
+        stmt += lambda s: s.where(Trace.started_at >= since)
+    if before and before_id:
+        stmt += lambda s: s.where(
+            tuple_(Trace.started_at, Trace.id) < tuple_(before, type_coerce(before_id, Trace.id.type))
+        )
+    elif before:
+        stmt += lambda s: s.where(Trace.started_at < before)
     
-    if conditions:
-        query = query.where(and_(*conditions))
+    stmt += lambda s: s.order_by(desc(Trace.started_at), desc(Trace.id)).offset(skip).limit(limit)
+    result = await db.execute(stmt)
+    traces = result.mappings().all()
     
-    query = query.order_by(desc(Trace.started_at)).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    headers = None
+    if traces and len(traces) == limit:
+        headers = {
+            "X-Next-Before": traces[-1]["started_at"].isoformat(),
+            "X-Next-Before-Id": traces[-1]["id"]
+        }
+    return json_rows(traces, headers)
 
 
 @app.get("/api/traces/{trace_id}", response_model=TraceResponse)
 async def get_trace(trace_id: str, db: AsyncSession = Depends(get_db)):
-    """Get a specific trace with all events."""
-    result = await db.execute(
-        select(Trace)
-        .options(selectinload(Trace.events), selectinload(Trace.costs))
-        .where(Trace.id == trace_id)
-    )
-    trace = result.scalar_one_or_none()
+    """Get a specific trace."""
+    # TraceResponse carries no events or costs, so a primary-key lookup is all
+    # this needs; eager-loading the relationships only cost extra round-trips
+    trace = await db.get(Trace, trace_id) if is_uuid(trace_id) else None
     if not trace:
         raise HTTPException(status_code=404, detail="Trace not found")
     return trace
@@ -255,41 +588,20 @@ async def get_trace(trace_id: str, db: AsyncSession = Depends(get_db)):
 @app.post("/api/events", response_model=EventResponse)
 async def create_event(event: EventCreate, db: AsyncSession = Depends(get_db)):
     """Log an event within a trace."""
-    db_event = Event(
-        id=str(uuid.uuid4()),
-        trace_id=event.trace_id,
-        timestamp=datetime.utcnow(),
-        event_type=event.event_type.value,
-        event_name=event.event_name,
-        input_data=event.input_data,
-        output_data=event.output_data,
-        duration_ms=event.duration_ms,
-        status=event.status,
-        model=event.model,
-        input_tokens=event.input_tokens,
-        output_tokens=event.output_tokens,
-        attributes=event.attributes
-    )
-    db.add(db_event)
-    
-    # Auto-create cost for LLM calls
-    if event.event_type.value == "llm_call" and event.model and event.input_tokens and event.output_tokens:
-        cost_amount = calculate_cost(event.model, event.input_tokens, event.output_tokens)
-        db_cost = Cost(
-            id=str(uuid.uuid4()),
-            trace_id=event.trace_id,
-            timestamp=datetime.utcnow(),
-            amount=cost_amount,
-            currency="USD",
-            category="llm",
-            model=event.model,
-            input_tokens=event.input_tokens,
-            output_tokens=event.output_tokens
-        )
-        db.add(db_cost)
+    now = datetime.utcnow()
+    row = event_row(event, now)
+    if keep_event(event):
+        # Returned as stored, so its IDs match what GET /api/events lists
+        created = await insert_returning(db, Event, row, _EVENT_COLUMNS)
+    else:
+        # Sampled out: shaped as the UUID columns would hand it back
+        created = {**row, "id": str(uuid.UUID(row["id"])), "trace_id": str(uuid.UUID(row["trace_id"]))}
     
-    await db.flush()
-    return db_event
+    # Auto-create cost for LLM calls (even when the event itself is sampled out)
+    if has_llm_cost(event):
+        await db.execute(insert(Cost).values(**llm_cost_row(event, now)))
+    
+    return created
 
 
 @app.get("/api/events", response_model=List[EventResponse])
@@ -298,12 +610,14 @@ async def list_events(
     db: AsyncSession = Depends(get_db)
 ):
     """List events for a trace."""
+    if not is_uuid(trace_id):
+        return []
     result = await db.execute(
-        select(Event)
+        select(*_EVENT_COLUMNS)
         .where(Event.trace_id == trace_id)
         .order_by(Event.timestamp)
     )
-    return result.scalars().all()
+    return json_rows(result.mappings())
 
 
 # ============================================================================
@@ -313,23 +627,7 @@ async def list_events(
 @app.post("/api/costs", response_model=CostResponse)
 async def create_cost(cost: CostCreate, db: AsyncSession = Depends(get_db)):
     """Log a cost entry."""
-    db_cost = Cost(
-        id=str(uuid.uuid4()),
-        trace_id=cost.trace_id,
-        timestamp=datetime.utcnow(),
-        amount=cost.amount,
-        currency=cost.currency,
-        category=cost.category.value,
-        subcategory=cost.subcategory,
-        model=cost.model,
-        input_tokens=cost.input_tokens,
-        output_tokens=cost.output_tokens,
-        customer_id=cost.customer_id,
-        team_id=cost.team_id
-    )
-    db.add(db_cost)
-    await db.flush()
-    return db_cost
+    return await insert_returning(db, Cost, cost_row(cost, datetime.utcnow()), _COST_COLUMNS)
 
 
 @app.get("/api/costs/summary")
@@ -339,37 +637,55 @@ async def get_cost_summary(
     db: AsyncSession = Depends(get_db)
 ):
     """Get cost summary."""
+    cache_key = (since, agent_id)
+    cached = _cost_summary_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     if not since:
         since = datetime.utcnow() - timedelta(days=30)
     
-    query = select(
+    # Whole buckets before the rollup watermark come from AggregatedMetrics,
+    # the rest of the window from the raw Cost table
+    mark = await rollup_mark(db, COST_BUCKET)
+    rolled = rolled_range(since, mark, COST_BUCKET)
+    
+    raw_query = select(
         func.sum(Cost.amount).label("total"),
         func.count(Cost.id).label("count"),
         Cost.category
-    ).where(Cost.timestamp >= since)
+    ).where(raw_condition(Cost.timestamp, since, rolled))
     
     if agent_id:
-        query = query.join(Trace).where(Trace.agent_id == agent_id)
+        raw_query = raw_query.join(Trace).where(Trace.agent_id == agent_id)
+    
+    queries = [raw_query.group_by(Cost.category)]
     
-    query = query.group_by(Cost.category)
-    result = await db.execute(query)
+    if rolled:
+        rollup_query = select(
+            func.sum(AggregatedMetrics.total_cost).label("total"),
+            func.sum(AggregatedMetrics.cost_count).label("count"),
+            AggregatedMetrics.category
+        ).where(rollup_condition(COST_BUCKET, rolled, agent_id))
+        queries.append(rollup_query.group_by(AggregatedMetrics.category))
     
-    breakdown = []
+    breakdown = {}
     total = 0
-    for row in result:
-        breakdown.append({
-            "category": row.category,
-            "amount": float(row.total or 0),
-            "count": row.count
-        })
-        total += float(row.total or 0)
+    for query in queries:
+        for row in await db.execute(query):
+            entry = breakdown.setdefault(row.category, {"category": row.category, "amount": 0.0, "count": 0})
+            entry["amount"] += float(row.total or 0)
+            entry["count"] += row.count or 0
+            total += float(row.total or 0)
     
-    return {
+    summary = {
         "total": round(total, 2),
         "currency": "USD",
-        "since": since.isoformat(),
-        "breakdown": breakdown
+        "since": since,
+        "breakdown": list(breakdown.values())
     }
+    _cost_summary_cache.set(cache_key, summary)
+    return summary
 
 
 # ============================================================================
@@ -382,25 +698,8 @@ async def create_compliance_event(
     db: AsyncSession = Depends(get_db)
 ):
     """Log a compliance event."""
-    db_event = ComplianceEvent(
-        id=str(uuid.uuid4()),
-        trace_id=event.trace_id,
-        timestamp=datetime.utcnow(),
-        event_type=event.event_type,
-        action=event.action,
-        resource=event.resource,
-        resource_type=event.resource_type,
-        justification=event.justification,
-        data_classification=event.data_classification.value if event.data_classification else None,
-        actor_type=event.actor_type,
-        actor_id=event.actor_id,
-        outcome=event.outcome,
-        request_data=event.request_data,
-        response_data=event.response_data
-    )
-    db.add(db_event)
-    await db.flush()
-    return db_event
+    row = compliance_event_row(event, datetime.utcnow())
+    return await insert_returning(db, ComplianceEvent, row, _COMPLIANCE_EVENT_COLUMNS)
 
 
 @app.get("/api/compliance", response_model=List[ComplianceEventResponse])
@@ -413,22 +712,16 @@ async def list_compliance_events(
     db: AsyncSession = Depends(get_db)
 ):
     """List compliance events."""
-    query = select(ComplianceEvent)
-    
-    conditions = []
+    stmt = _LIST_COMPLIANCE_EVENTS
     if trace_id:
-        conditions.append(ComplianceEvent.trace_id == trace_id)
+        stmt += lambda s: s.where(ComplianceEvent.trace_id == trace_id)
     if event_type:
-        conditions.append(ComplianceEvent.event_type == event_type)
+        stmt += lambda s: s.where(ComplianceEvent.event_type == event_type)
     if since:
-        conditions.append(ComplianceEvent.timestamp >= since)
-    
-    if conditions:
-        query = query.where(and_(*conditions))
+        stmt += lambda s: s.where(ComplianceEvent.timestamp >= since)
     
-    query = query.order_by(desc(ComplianceEvent.timestamp)).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    stmt += lambda s: s.order_by(desc(ComplianceEvent.timestamp)).offset(skip).limit(limit)
+    return await stream_rows(db, stmt)
 
 
 @app.get("/api/compliance/report")
@@ -443,55 +736,43 @@ async def generate_compliance_report(
     if not until:
         until = datetime.utcnow()
     
-    # Get event counts by type
-    event_counts = await db.execute(
+    # One scan grouped by all three dimensions, folded into the three
+    # distributions here (portable, unlike GROUPING SETS, and the group
+    # count is tiny)
+    result = await db.execute(
         select(
             ComplianceEvent.event_type,
+            ComplianceEvent.outcome,
+            ComplianceEvent.data_classification,
             func.count(ComplianceEvent.id).label("count")
         )
         .where(and_(
             ComplianceEvent.timestamp >= since,
             ComplianceEvent.timestamp <= until
         ))
-        .group_by(ComplianceEvent.event_type)
-    )
-    
-    # Get outcome distribution
-    outcomes = await db.execute(
-        select(
+        .group_by(
+            ComplianceEvent.event_type,
             ComplianceEvent.outcome,
-            func.count(ComplianceEvent.id).label("count")
+            ComplianceEvent.data_classification
         )
-        .where(and_(
-            ComplianceEvent.timestamp >= since,
-            ComplianceEvent.timestamp <= until
-        ))
-        .group_by(ComplianceEvent.outcome)
     )
     
-    # Get data classification distribution
-    classifications = await db.execute(
-        select(
-            ComplianceEvent.data_classification,
-            func.count(ComplianceEvent.id).label("count")
-        )
-        .where(and_(
-            ComplianceEvent.timestamp >= since,
-            ComplianceEvent.timestamp <= until,
-            ComplianceEvent.data_classification.isnot(None)
-        ))
-        .group_by(ComplianceEvent.data_classification)
-    )
+    event_types, outcomes, classifications = {}, {}, {}
+    for row in result:
+        event_types[row.event_type] = event_types.get(row.event_type, 0) + row.count
+        outcomes[row.outcome] = outcomes.get(row.outcome, 0) + row.count
+        if row.data_classification is not None:
+            classifications[row.data_classification] = classifications.get(row.data_classification, 0) + row.count
     
     return {
         "report_period": {
-            "start": since.isoformat(),
-            "end": until.isoformat()
+            "start": since,
+            "end": until
         },
-        "event_types": {row.event_type: row.count for row in event_counts},
-        "outcomes": {row.outcome: row.count for row in outcomes},
-        "data_classifications": {row.data_classification: row.count for row in classifications},
-        "generated_at": datetime.utcnow().isoformat()
+        "event_types": event_types,
+        "outcomes": outcomes,
+        "data_classifications": classifications,
+        "generated_at": datetime.utcnow()
     }
 
 
@@ -502,20 +783,18 @@ async def generate_compliance_report(
 @app.post("/api/alerts", response_model=AlertResponse)
 async def create_alert(alert: AlertCreate, db: AsyncSession = Depends(get_db)):
     """Create a new alert."""
-    db_alert = Alert(
-        id=str(uuid.uuid4()),
+    row = dict(
+        id=uuid.uuid4().hex,
         timestamp=datetime.utcnow(),
         alert_type=alert.alert_type,
-        severity=alert.severity.value,
+        severity=alert.severity,
         title=alert.title,
         description=alert.description,
         agent_id=alert.agent_id,
         trace_id=alert.trace_id,
         details=alert.details
     )
-    db.add(db_alert)
-    await db.flush()
-    return db_alert
+    return await insert_returning(db, Alert, row, _ALERT_COLUMNS)
 
 
 @app.get("/api/alerts", response_model=List[AlertResponse])
@@ -528,22 +807,16 @@ async def list_alerts(
     db: AsyncSession = Depends(get_db)
 ):
     """List alerts."""
-    query = select(Alert)
-    
-    conditions = []
+    stmt = _LIST_ALERTS
     if status:
-        conditions.append(Alert.status == status)
+        stmt += lambda s: s.where(Alert.status == status)
     if severity:
-        conditions.append(Alert.severity == severity)
+        stmt += lambda s: s.where(Alert.severity == severity)
     if since:
-        conditions.append(Alert.timestamp >= since)
-    
-    if conditions:
-        query = query.where(and_(*conditions))
+        stmt += lambda s: s.where(Alert.timestamp >= since)
     
-    query = query.order_by(desc(Alert.timestamp)).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    stmt += lambda s: s.order_by(desc(Alert.timestamp)).offset(skip).limit(limit)
+    return await stream_rows(db, stmt)
 
 
 @app.patch("/api/alerts/{alert_id}")
@@ -553,18 +826,21 @@ async def update_alert_status(
     db: AsyncSession = Depends(get_db)
 ):
     """Update alert status."""
-    result = await db.execute(select(Alert).where(Alert.id == alert_id))
-    alert = result.scalar_one_or_none()
-    if not alert:
+    if not is_uuid(alert_id):
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    alert.status = status
+    values = {"status": status}
     if status == "acknowledged":
-        alert.acknowledged_at = datetime.utcnow()
+        values["acknowledged_at"] = datetime.utcnow()
     elif status == "resolved":
-        alert.resolved_at = datetime.utcnow()
+        values["resolved_at"] = datetime.utcnow()
     
-    await db.flush()
+    # One round-trip: RETURNING tells us whether the alert existed
+    result = await db.execute(
+        update(Alert).where(Alert.id == alert_id).values(**values).returning(Alert.id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Alert not found")
     return {"status": "updated"}
 
 
@@ -572,6 +848,16 @@ async def update_alert_status(
 # Analytics / Dashboard Endpoints
 # ============================================================================
 
+def default_since(days: int) -> datetime:
+    """
+    Start of the default analytics window, `days` back.
+    
+    Truncated to the minute, so repeated polls query the same window and
+    produce identical responses (and ETags) until the data changes.
+    """
+    return (datetime.utcnow() - timedelta(days=days)).replace(second=0, microsecond=0)
+
+
 @app.get("/api/analytics/summary")
 async def get_analytics_summary(
     since: Optional[datetime] = None,
@@ -580,47 +866,66 @@ async def get_analytics_summary(
 ):
     """Get summary analytics for dashboard."""
     if not since:
-        since = datetime.utcnow() - timedelta(days=7)
+        since = default_since(7)
     
-    # Base query conditions
-    conditions = [Trace.started_at >= since]
-    if agent_id:
-        conditions.append(Trace.agent_id == agent_id)
+    # As in the cost summary, whole buckets before each rollup watermark come
+    # from AggregatedMetrics and only the rest of the window from raw rows
+    trace_rolled = rolled_range(since, await rollup_mark(db, TRACE_BUCKET), TRACE_BUCKET)
+    cost_rolled = rolled_range(since, await rollup_mark(db, COST_BUCKET), COST_BUCKET)
     
-    # Get trace counts
-    from sqlalchemy import case
-    trace_stats = await db.execute(
+    trace_queries = [
         select(
             func.count(Trace.id).label("total"),
-            func.sum(case((Trace.status == "success", 1), else_=0)).label("success"),
-            func.sum(case((Trace.status == "error", 1), else_=0)).label("errors"),
-            func.avg(Trace.duration_ms).label("avg_duration")
-        ).where(and_(*conditions))
-    )
-    stats = trace_stats.one()
-    
-    # Get total cost
-    cost_conditions = [Cost.timestamp >= since]
+            func.count(Trace.id).filter(Trace.status == "success").label("success"),
+            func.count(Trace.id).filter(Trace.status == "error").label("errors"),
+            func.sum(Trace.duration_ms).label("duration"),
+            func.count(Trace.duration_ms).label("timed")
+        ).where(raw_condition(Trace.started_at, since, trace_rolled))
+    ]
+    cost_query = select(
+        func.sum(Cost.amount).label("cost"),
+        func.sum(Cost.input_tokens).label("input"),
+        func.sum(Cost.output_tokens).label("output")
+    ).where(raw_condition(Cost.timestamp, since, cost_rolled))
     if agent_id:
-        cost_conditions.append(Trace.agent_id == agent_id)
-        cost_query = select(func.sum(Cost.amount)).join(Trace).where(and_(*cost_conditions))
-    else:
-        cost_query = select(func.sum(Cost.amount)).where(Cost.timestamp >= since)
+        trace_queries[0] = trace_queries[0].where(Trace.agent_id == agent_id)
+        cost_query = cost_query.join(Trace).where(Trace.agent_id == agent_id)
+    cost_queries = [cost_query]
     
-    total_cost = await db.execute(cost_query)
-    cost = total_cost.scalar() or 0
+    if trace_rolled:
+        trace_queries.append(
+            select(
+                func.sum(AggregatedMetrics.trace_count).label("total"),
+                func.sum(AggregatedMetrics.success_count).label("success"),
+                func.sum(AggregatedMetrics.error_count).label("errors"),
+                func.sum(AggregatedMetrics.total_duration_ms).label("duration"),
+                func.sum(AggregatedMetrics.duration_count).label("timed")
+            ).where(rollup_condition(TRACE_BUCKET, trace_rolled, agent_id))
+        )
+    if cost_rolled:
+        cost_queries.append(
+            select(
+                func.sum(AggregatedMetrics.total_cost).label("cost"),
+                func.sum(AggregatedMetrics.total_input_tokens).label("input"),
+                func.sum(AggregatedMetrics.total_output_tokens).label("output")
+            ).where(rollup_condition(COST_BUCKET, cost_rolled, agent_id))
+        )
     
-    # Get token counts
-    token_query = select(
-        func.sum(Cost.input_tokens).label("input"),
-        func.sum(Cost.output_tokens).label("output")
-    ).where(Cost.timestamp >= since)
-    tokens = await db.execute(token_query)
-    token_data = tokens.one()
+    total = success = errors = duration = timed = 0
+    for query in trace_queries:
+        stats = (await db.execute(query)).one()
+        total += stats.total or 0
+        success += stats.success or 0
+        errors += stats.errors or 0
+        duration += stats.duration or 0
+        timed += stats.timed or 0
     
-    total = stats.total or 0
-    success = stats.success or 0
-    errors = stats.errors or 0
+    cost = input_tokens = output_tokens = 0
+    for query in cost_queries:
+        costs = (await db.execute(query)).one()
+        cost += costs.cost or 0
+        input_tokens += costs.input or 0
+        output_tokens += costs.output or 0
     
     return {
         "total_traces": total,
@@ -628,11 +933,11 @@ async def get_analytics_summary(
         "error_count": errors,
         "success_rate": round((success / total * 100) if total > 0 else 0, 1),
         "error_rate": round((errors / total * 100) if total > 0 else 0, 1),
-        "avg_duration_ms": round(stats.avg_duration or 0, 0),
+        "avg_duration_ms": round(duration / timed if timed > 0 else 0, 0),
         "total_cost": round(float(cost), 2),
-        "total_input_tokens": token_data.input or 0,
-        "total_output_tokens": token_data.output or 0,
-        "period_start": since.isoformat()
+        "total_input_tokens": input_tokens,
+        "total_output_tokens": output_tokens,
+        "period_start": since
     }
 
 
@@ -643,16 +948,17 @@ async def get_agent_analytics(
 ):
     """Get per-agent analytics."""
     if not since:
-        since = datetime.utcnow() - timedelta(days=7)
+        since = default_since(7)
     
-    from sqlalchemy import case
+    trace_count = func.count(Trace.id)
+    success_count = func.count(Trace.id).filter(Trace.status == "success")
     result = await db.execute(
         select(
             Agent.id,
             Agent.name,
-            func.count(Trace.id).label("trace_count"),
-            func.sum(case((Trace.status == "success", 1), else_=0)).label("success_count"),
-            func.avg(Trace.duration_ms).label("avg_duration")
+            trace_count.label("trace_count"),
+            func.round(100.0 * success_count / func.nullif(trace_count, 0), 1).label("success_rate"),
+            func.round(func.avg(Trace.duration_ms), 0).label("avg_duration")
         )
         .join(Trace, Agent.id == Trace.agent_id)
         .where(Trace.started_at >= since)
@@ -660,19 +966,16 @@ async def get_agent_analytics(
         .order_by(desc("trace_count"))
     )
     
-    agents = []
-    for row in result:
-        total = row.trace_count or 0
-        success = row.success_count or 0
-        agents.append({
+    return [
+        {
             "agent_id": row.id,
             "agent_name": row.name,
-            "trace_count": total,
-            "success_rate": round((success / total * 100) if total > 0 else 0, 1),
-            "avg_duration_ms": round(row.avg_duration or 0, 0)
-        })
-    
-    return agents
+            "trace_count": row.trace_count,
+            "success_rate": float(row.success_rate or 0),
+            "avg_duration_ms": float(row.avg_duration or 0)
+        }
+        for row in result
+    ]
 
 
 @app.get("/api/analytics/timeseries")
@@ -684,126 +987,269 @@ async def get_timeseries(
 ):
     """Get time series data for charts."""
     if not since:
-        since = datetime.utcnow() - timedelta(days=7)
+        since = default_since(7)
     
-    # Simple hourly aggregation using date functions
-    # For SQLite, we'll use strftime
+    # Hourly points. Whole rollup buckets before the watermark are re-bucketed
+    # by hour from AggregatedMetrics and merged with the raw remainder.
     if metric == "traces":
-        result = await db.execute(
-            select(
-                func.strftime("%Y-%m-%d %H:00:00", Trace.started_at).label("bucket"),
-                func.count(Trace.id).label("value")
-            )
-            .where(Trace.started_at >= since)
-            .group_by("bucket")
-            .order_by("bucket")
-        )
+        bucket_size, column = TRACE_BUCKET, Trace.started_at
+        raw_value = func.count(Trace.id)
+        rollup_value = func.sum(AggregatedMetrics.trace_count)
+        raw_filters, rollup_filters = [], []
     elif metric == "cost":
-        result = await db.execute(
-            select(
-                func.strftime("%Y-%m-%d %H:00:00", Cost.timestamp).label("bucket"),
-                func.sum(Cost.amount).label("value")
-            )
-            .where(Cost.timestamp >= since)
-            .group_by("bucket")
-            .order_by("bucket")
-        )
+        bucket_size, column = COST_BUCKET, Cost.timestamp
+        raw_value = func.sum(Cost.amount)
+        rollup_value = func.sum(AggregatedMetrics.total_cost)
+        raw_filters, rollup_filters = [], []
     elif metric == "errors":
-        result = await db.execute(
-            select(
-                func.strftime("%Y-%m-%d %H:00:00", Trace.started_at).label("bucket"),
-                func.count(Trace.id).label("value")
-            )
-            .where(and_(Trace.started_at >= since, Trace.status == "error"))
-            .group_by("bucket")
-            .order_by("bucket")
-        )
+        bucket_size, column = TRACE_BUCKET, Trace.started_at
+        raw_value = func.count(Trace.id)
+        rollup_value = func.sum(AggregatedMetrics.error_count)
+        raw_filters, rollup_filters = [Trace.status == "error"], [AggregatedMetrics.error_count > 0]
     else:
         raise HTTPException(status_code=400, detail="Invalid metric")
     
-    return [{"timestamp": row.bucket, "value": float(row.value or 0)} for row in result]
+    dialect = db.bind.dialect.name
+    rolled = rolled_range(since, await rollup_mark(db, bucket_size), bucket_size)
+    
+    raw_bucket = bucket_expr(column, "1h", dialect).label("bucket")
+    queries = [
+        select(raw_bucket, raw_value.label("value"))
+        .where(raw_condition(column, since, rolled), *raw_filters)
+        .group_by(raw_bucket)
+    ]
+    if rolled:
+        rollup_bucket = bucket_expr(AggregatedMetrics.bucket_start, "1h", dialect).label("bucket")
+        queries.append(
+            select(rollup_bucket, rollup_value.label("value"))
+            .where(rollup_condition(bucket_size, rolled), *rollup_filters)
+            .group_by(rollup_bucket)
+        )
+    
+    values = {}
+    for query in queries:
+        for row in await db.execute(query):
+            values[row.bucket] = values.get(row.bucket, 0.0) + float(row.value or 0)
+    return [{"timestamp": bucket, "value": values[bucket]} for bucket in sorted(values)]
+
+
+@app.get("/api/dashboard")
+async def get_dashboard(db: AsyncSession = Depends(get_db)):
+    """
+    Everything the dashboard shows, in one request.
+    
+    Keys are the dashboard's sections; each value is what the matching
+    endpoint returns. The queries share the request's session, so the
+    snapshot is read in one transaction.
+    """
+    cached = _dashboard_cache.get("dashboard")
+    if cached is not None:
+        return cached
+    
+    recent_traces = await db.execute(
+        select(*_TRACE_COLUMNS).order_by(desc(Trace.started_at), desc(Trace.id)).limit(10)
+    )
+    open_alerts = await db.execute(
+        select(*_ALERT_COLUMNS).where(Alert.status == "open").order_by(desc(Alert.timestamp)).limit(5)
+    )
+    dashboard = {
+        "summary": await get_analytics_summary(db=db),
+        "traces_timeseries": await get_timeseries(metric="traces", db=db),
+        "cost_timeseries": await get_timeseries(metric="cost", db=db),
+        "agents": await get_agent_analytics(db=db),
+        "traces": [dict(row) for row in recent_traces.mappings()],
+        "alerts": [dict(row) for row in open_alerts.mappings()]
+    }
+    _dashboard_cache.set("dashboard", dashboard)
+    return dashboard
 
 
 # ============================================================================
 # Bulk Ingest Endpoint
 # ============================================================================
 
-@app.post("/api/ingest", response_model=BulkIngestResponse)
-async def bulk_ingest(request: BulkIngestRequest, db: AsyncSession = Depends(get_db)):
-    """Bulk ingest telemetry data."""
-    response = BulkIngestResponse()
-    
-    # Process traces
-    if request.traces:
-        for trace in request.traces:
-            try:
-                db_trace = Trace(
-                    id=str(uuid.uuid4()),
-                    agent_id=trace.agent_id,
-                    parent_trace_id=trace.parent_trace_id,
-                    started_at=datetime.utcnow(),
-                    environment=trace.environment,
-                    user_id=trace.user_id,
-                    session_id=trace.session_id,
-                    task_type=trace.task_type,
-                    input_summary=trace.input_summary,
-                    attributes=trace.attributes,
-                    status="running"
-                )
-                db.add(db_trace)
-                response.traces_created += 1
-            except Exception as e:
-                response.errors.append(f"Trace error: {str(e)}")
-    
-    # Process events
-    if request.events:
-        for event in request.events:
-            try:
-                db_event = Event(
-                    id=str(uuid.uuid4()),
-                    trace_id=event.trace_id,
-                    timestamp=datetime.utcnow(),
-                    event_type=event.event_type.value,
-                    event_name=event.event_name,
-                    input_data=event.input_data,
-                    output_data=event.output_data,
-                    duration_ms=event.duration_ms,
-                    status=event.status,
-                    model=event.model,
-                    input_tokens=event.input_tokens,
-                    output_tokens=event.output_tokens,
-                    attributes=event.attributes
-                )
-                db.add(db_event)
-                response.events_created += 1
-            except Exception as e:
-                response.errors.append(f"Event error: {str(e)}")
-    
-    # Process costs
-    if request.costs:
-        for cost in request.costs:
-            try:
-                db_cost = Cost(
-                    id=str(uuid.uuid4()),
-                    trace_id=cost.trace_id,
-                    timestamp=datetime.utcnow(),
-                    amount=cost.amount,
-                    currency=cost.currency,
-                    category=cost.category.value,
-                    subcategory=cost.subcategory,
-                    model=cost.model,
-                    input_tokens=cost.input_tokens,
-                    output_tokens=cost.output_tokens,
-                    customer_id=cost.customer_id,
-                    team_id=cost.team_id
-                )
-                db.add(db_cost)
-                response.costs_created += 1
-            except Exception as e:
-                response.errors.append(f"Cost error: {str(e)}")
-    
-    await db.flush()
-    return response
+def copy_value(column, value):
+    """Encode a row value the way asyncpg's COPY expects for its column."""
+    if value is None:
+        return None
+    if isinstance(column.type, Uuid):
+        return uuid.UUID(value)
+    if isinstance(column.type, JSON):
+        # SQLAlchemy registers JSON codecs on asyncpg that take text
+        return orjson.dumps(value).decode()
+    return value
+
+
+async def copy_rows(db: AsyncSession, model, rows: List[dict]) -> int:
+    """
+    Write rows with asyncpg's binary COPY. Returns the number written.
+    
+    COPY skips SQL parsing and per-row parameter binding entirely. It runs on
+    the session's own connection, so the rows join the request transaction.
+    Every row builder sets each column it needs, so no Python-side defaults
+    are lost by bypassing SQLAlchemy.
+    """
+    table = model.__table__
+    names = list(rows[0])
+    columns = [table.c[name] for name in names]
+    records = [tuple(copy_value(c, row[c.name]) for c in columns) for row in rows]
+    
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=names)
+    return len(rows)
+
+
+async def insert_rows(db: AsyncSession, model, rows: List[dict], errors: List[str]) -> int:
+    """
+    Insert rows with one executemany INSERT (COPY on asyncpg). Returns the
+    number inserted.
+    
+    If the batch fails, rows are retried one at a time so a single bad row
+    only costs itself; its error is appended to `errors`.
+    """
+    if not rows:
+        return 0
+    if db.bind.dialect.driver == "asyncpg":
+        try:
+            async with db.begin_nested():
+                return await copy_rows(db, model, rows)
+        except Exception:
+            # Constraint violations and unencodable values (e.g. a malformed
+            # client-supplied ID) fall back to INSERTs, which isolate bad rows
+            pass
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(model), rows)
+        return len(rows)
+    except SQLAlchemyError:
+        pass
+    
+    inserted = 0
+    for row in rows:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(model), [row])
+            inserted += 1
+        except SQLAlchemyError as e:
+            errors.append(f"{model.__tablename__} {row['id']}: {getattr(e, 'orig', e)}")
+    return inserted
+
+
+async def bulk_ingest_body(request: Request) -> BulkIngestRequest:
+    """
+    Parse the bulk ingest body with pydantic's JSON validator.
+    
+    model_validate_json() parses and validates the raw bytes in one pass
+    inside pydantic-core, instead of FastAPI's json.loads() into Python
+    dicts followed by validation. Invalid bodies still get FastAPI's 422.
+    """
+    try:
+        return BulkIngestRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+        ])
+
+
+async def complete_traces(db: AsyncSession, completions: List[TraceCompletion], errors: List[str]) -> int:
+    """Apply trace completions, loading all their traces in one query. Returns the number applied."""
+    if not completions:
+        return 0
+    ids = [uuid.UUID(c.id).hex for c in completions if is_uuid(c.id)]
+    result = await db.execute(select(Trace).where(Trace.id.in_(ids)))
+    # Normalised, since PostgreSQL hands UUIDs back in hyphenated form
+    traces = {uuid.UUID(trace.id).hex: trace for trace in result.scalars()}
+    
+    completed = 0
+    late = []
+    for completion in completions:
+        trace = traces.get(uuid.UUID(completion.id).hex) if is_uuid(completion.id) else None
+        if trace is None:
+            errors.append(f"traces {completion.id}: not found")
+            continue
+        apply_trace_update(trace, completion)
+        if completion.status:
+            late.append(trace.started_at)
+        completed += 1
+    await mark_late_traces(db, late)
+    return completed
+
+
+async def ingest_batch(db: AsyncSession, request: BulkIngestRequest) -> BulkIngestResponse:
+    """Write a bulk ingest batch, traces first. Returns the per-table counts."""
+    request_traces = request.traces or []
+    request_events = [e for e in request.events or [] if keep_event(e)]
+    request_costs = request.costs or []
+    request_compliance_events = request.compliance_events or []
+    priced = [e for e in request.events or [] if has_llm_cost(e)]
+    
+    # One clock read and one urandom read for the whole batch
+    now = datetime.utcnow()
+    ids = iter(new_ids(
+        len(request_traces) + len(request_events) + len(request_costs)
+        + len(request_compliance_events) + len(priced)
+    ))
+    
+    traces = [trace_row(t, now, next(ids)) for t in request_traces]
+    events = [event_row(e, now, next(ids)) for e in request_events]
+    costs = [cost_row(c, now, next(ids)) for c in request_costs]
+    compliance_events = [compliance_event_row(ce, now, next(ids)) for ce in request_compliance_events]
+    
+    # Auto-create costs for LLM calls, as the single-event endpoint does,
+    # pricing the whole batch in one vectorised pass
+    amounts = calculate_costs(
+        [e.model for e in priced],
+        [e.input_tokens for e in priced],
+        [e.output_tokens for e in priced]
+    )
+    llm_costs = [llm_cost_row(e, now, amount, next(ids)) for e, amount in zip(priced, amounts)]
+    
+    # Traces first, so rows in the batch can reference them (and completions
+    # can finish traces started in the same batch)
+    errors = []
+    traces_created = await insert_rows(db, Trace, traces, errors)
+    await mark_late_traces(db, [row["started_at"] for row in traces])
+    traces_completed = await complete_traces(db, request.completions or [], errors)
+    events_created = await insert_rows(db, Event, events, errors)
+    costs_created = await insert_rows(db, Cost, costs, errors)
+    await insert_rows(db, Cost, llm_costs, errors)
+    compliance_events_created = await insert_rows(db, ComplianceEvent, compliance_events, errors)
+    
+    return BulkIngestResponse(
+        traces_created=traces_created,
+        traces_completed=traces_completed,
+        events_created=events_created,
+        costs_created=costs_created,
+        compliance_events_created=compliance_events_created,
+        errors=errors
+    )
+
+
+@app.post(
+    "/api/ingest",
+    response_model=BulkIngestResponse,
+    openapi_extra={"requestBody": {
+        "content": {"application/json": {"schema": BulkIngestRequest.model_json_schema()}},
+        "required": True
+    }}
+)
+async def bulk_ingest(
+    request: BulkIngestRequest = Depends(bulk_ingest_body),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk ingest telemetry data.
+    
+    Rows are built as plain dicts and written with one executemany INSERT
+    per table, skipping ORM object construction and unit-of-work flushing,
+    so a batch costs one HTTP request and one transaction instead of one per
+    record. Traces may carry client-supplied IDs so that events, costs and
+    compliance events in the same batch can reference them, and completions
+    finish traces by ID, so a client can end a trace together with the
+    records it logged.
+    """
+    return await ingest_batch(db, request)
 
 
 # ============================================================================
@@ -811,5 +1257,17 @@ async def bulk_ingest(request: BulkIngestRequest, db: AsyncSession = Depends(get
 # ============================================================================
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8765)
+    # Both ship with uvicorn[standard]; uvloop has no Windows build.
+    # AGENTWATCH_UDS serves on a Unix socket instead of TCP, for SDK clients
+    # on the same host (api_url="unix:///path/to.sock")
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8765,
+        uds=os.getenv("AGENTWATCH_UDS"),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        timeout_keep_alive=65  # Outlive the clients' 60s idle pool
+    )
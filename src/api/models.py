@@ -6,12 +6,21 @@ Core data models for agent telemetry, compliance, and analytics.
 
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, String, Float, Integer, DateTime, Text, Boolean, ForeignKey, JSON, Index
+from sqlalchemy import Column, String, Float, Integer, DateTime, Text, Boolean, ForeignKey, JSON, Index, Uuid, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
 
 Base = declarative_base()
 
+# JSON payloads are stored as JSONB on PostgreSQL (pre-parsed binary, no
+# re-parse on read), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Generated IDs use Uuid columns: native UUID on PostgreSQL, 32 hex chars
+# elsewhere. Agent IDs stay strings: the SDK derives uuid5s from agent names,
+# but register_agent() and POST /api/agents accept any caller-chosen ID.
+
 
 class Agent(Base):
     """Registered agents in the system."""
@@ -25,20 +34,22 @@ class Agent(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = Column(Boolean, default=True)
-    config = Column(JSON)  # Agent configuration metadata
+    config = Column(JSONType)  # Agent configuration metadata
     
-    # Relationships
-    traces = relationship("Trace", back_populates="agent")
-    policies = relationship("Policy", back_populates="agent")
+    # Relationships. Nothing reads these through attribute access; lazy="raise"
+    # turns an accidental lazy load (a blocking query in async code, or an
+    # N+1 from a serialiser) into an error. Use selectinload() where needed.
+    traces = relationship("Trace", back_populates="agent", lazy="raise")
+    policies = relationship("Policy", back_populates="agent", lazy="raise")
 
 
 class Trace(Base):
     """Individual execution traces from agents."""
     __tablename__ = "traces"
     
-    id = Column(String(36), primary_key=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
     agent_id = Column(String(36), ForeignKey("agents.id"), nullable=False, index=True)
-    parent_trace_id = Column(String(36), ForeignKey("traces.id"), nullable=True)
+    parent_trace_id = Column(Uuid(as_uuid=False), ForeignKey("traces.id"), nullable=True)
     
     # Timing
     started_at = Column(DateTime, nullable=False, index=True)
@@ -59,17 +70,19 @@ class Trace(Base):
     # Metadata
     input_summary = Column(Text)  # Truncated/redacted input
     output_summary = Column(Text)  # Truncated/redacted output
-    attributes = Column(JSON)  # Custom key-value pairs
+    attributes = Column(JSONType)  # Custom key-value pairs
     
     # Relationships
-    agent = relationship("Agent", back_populates="traces")
-    events = relationship("Event", back_populates="trace")
-    costs = relationship("Cost", back_populates="trace")
-    compliance_events = relationship("ComplianceEvent", back_populates="trace")
+    agent = relationship("Agent", back_populates="traces", lazy="raise")
+    events = relationship("Event", back_populates="trace", lazy="raise")
+    costs = relationship("Cost", back_populates="trace", lazy="raise")
+    compliance_events = relationship("ComplianceEvent", back_populates="trace", lazy="raise")
     
     __table_args__ = (
         Index("ix_traces_agent_started", "agent_id", "started_at"),
         Index("ix_traces_status_started", "status", "started_at"),
+        Index("ix_traces_started_id", "started_at", "id"),  # Keyset pagination
+        Index("ix_traces_started_agent", "started_at", "agent_id"),  # Window scans across all agents
     )
 
 
@@ -77,16 +90,16 @@ class Event(Base):
     """Individual events within a trace (tool calls, decisions, etc.)."""
     __tablename__ = "events"
     
-    id = Column(String(36), primary_key=True)
-    trace_id = Column(String(36), ForeignKey("traces.id"), nullable=False, index=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
+    trace_id = Column(Uuid(as_uuid=False), ForeignKey("traces.id"), nullable=False, index=True)
     
-    timestamp = Column(DateTime, nullable=False, index=True)
+    timestamp = Column(DateTime, nullable=False, index=True, server_default=func.now())
     event_type = Column(String(50), nullable=False, index=True)  # tool_call, llm_call, decision, error
     event_name = Column(String(255))
     
     # Event details
-    input_data = Column(JSON)
-    output_data = Column(JSON)
+    input_data = Column(JSONType)
+    output_data = Column(JSONType)
     duration_ms = Column(Integer)
     status = Column(String(20))
     
@@ -96,18 +109,18 @@ class Event(Base):
     output_tokens = Column(Integer)
     
     # Metadata
-    attributes = Column(JSON)
+    attributes = Column(JSONType)
     
     # Relationships
-    trace = relationship("Trace", back_populates="events")
+    trace = relationship("Trace", back_populates="events", lazy="raise")
 
 
 class Cost(Base):
     """Cost tracking for agent operations."""
     __tablename__ = "costs"
     
-    id = Column(String(36), primary_key=True)
-    trace_id = Column(String(36), ForeignKey("traces.id"), nullable=False, index=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
+    trace_id = Column(Uuid(as_uuid=False), ForeignKey("traces.id"), nullable=False, index=True)
     
     timestamp = Column(DateTime, nullable=False, index=True)
     amount = Column(Float, nullable=False)
@@ -127,11 +140,12 @@ class Cost(Base):
     team_id = Column(String(255), index=True)
     
     # Relationships
-    trace = relationship("Trace", back_populates="costs")
+    trace = relationship("Trace", back_populates="costs", lazy="raise")
     
     __table_args__ = (
         Index("ix_costs_category_timestamp", "category", "timestamp"),
         Index("ix_costs_customer_timestamp", "customer_id", "timestamp"),
+        Index("ix_costs_trace_timestamp", "trace_id", "timestamp"),  # Per-agent cost via the trace join
     )
 
 
@@ -139,8 +153,8 @@ class ComplianceEvent(Base):
     """Compliance and audit trail events."""
     __tablename__ = "compliance_events"
     
-    id = Column(String(36), primary_key=True)
-    trace_id = Column(String(36), ForeignKey("traces.id"), nullable=False, index=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
+    trace_id = Column(Uuid(as_uuid=False), ForeignKey("traces.id"), nullable=False, index=True)
     
     timestamp = Column(DateTime, nullable=False, index=True)
     event_type = Column(String(50), nullable=False, index=True)  # data_access, pii_handling, decision, external_call
@@ -160,14 +174,14 @@ class ComplianceEvent(Base):
     
     # Outcome
     outcome = Column(String(20))  # allowed, denied, flagged
-    policy_id = Column(String(36))
+    policy_id = Column(Uuid(as_uuid=False))
     
     # Full audit data
-    request_data = Column(JSON)
-    response_data = Column(JSON)
+    request_data = Column(JSONType)
+    response_data = Column(JSONType)
     
     # Relationships
-    trace = relationship("Trace", back_populates="compliance_events")
+    trace = relationship("Trace", back_populates="compliance_events", lazy="raise")
     
     __table_args__ = (
         Index("ix_compliance_type_timestamp", "event_type", "timestamp"),
@@ -178,7 +192,7 @@ class Policy(Base):
     """Policies and guardrails for agents."""
     __tablename__ = "policies"
     
-    id = Column(String(36), primary_key=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
     agent_id = Column(String(36), ForeignKey("agents.id"), nullable=True)  # null = global policy
     
     name = Column(String(255), nullable=False)
@@ -186,7 +200,7 @@ class Policy(Base):
     policy_type = Column(String(50), nullable=False)  # cost_limit, allowed_tools, data_handling, rate_limit
     
     # Policy definition
-    config = Column(JSON, nullable=False)  # Policy-specific configuration
+    config = Column(JSONType, nullable=False)  # Policy-specific configuration
     
     # Status
     is_active = Column(Boolean, default=True)
@@ -197,14 +211,14 @@ class Policy(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
-    agent = relationship("Agent", back_populates="policies")
+    agent = relationship("Agent", back_populates="policies", lazy="raise")
 
 
 class Alert(Base):
     """Alerts generated by the system."""
     __tablename__ = "alerts"
     
-    id = Column(String(36), primary_key=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
     
     timestamp = Column(DateTime, nullable=False, index=True)
     alert_type = Column(String(50), nullable=False, index=True)  # anomaly, policy_violation, error_spike, cost_spike
@@ -215,8 +229,8 @@ class Alert(Base):
     
     # Context
     agent_id = Column(String(36), index=True)
-    trace_id = Column(String(36))
-    policy_id = Column(String(36))
+    trace_id = Column(Uuid(as_uuid=False))  # No foreign key: the SDK may send an alert before its trace
+    policy_id = Column(Uuid(as_uuid=False))
     
     # Status
     status = Column(String(20), default="open", index=True)  # open, acknowledged, resolved
@@ -225,14 +239,26 @@ class Alert(Base):
     acknowledged_by = Column(String(255))
     
     # Details
-    details = Column(JSON)
+    details = Column(JSONType)
+    
+    __table_args__ = (
+        # The dashboard lists open alerts newest first; a partial index over
+        # just the open ones serves that without a sort
+        Index(
+            "ix_alerts_open_ts",
+            timestamp.desc(),
+            sqlite_where=status == "open",
+            postgresql_where=status == "open",
+            postgresql_include=["severity", "alert_type", "title", "agent_id"]
+        ),
+    )
 
 
 class AggregatedMetrics(Base):
     """Pre-aggregated metrics for fast dashboard queries."""
     __tablename__ = "aggregated_metrics"
     
-    id = Column(String(36), primary_key=True)
+    id = Column(Uuid(as_uuid=False), primary_key=True)
     
     # Time bucket
     bucket_start = Column(DateTime, nullable=False, index=True)
@@ -242,6 +268,7 @@ class AggregatedMetrics(Base):
     agent_id = Column(String(36), index=True)
     environment = Column(String(50))
     task_type = Column(String(100))
+    category = Column(String(50))  # Cost category, for cost rollups
     
     # Metrics
     trace_count = Column(Integer, default=0)
@@ -249,15 +276,34 @@ class AggregatedMetrics(Base):
     error_count = Column(Integer, default=0)
     
     total_duration_ms = Column(Integer, default=0)
+    duration_count = Column(Integer, default=0)  # Traces with a duration, for weighted averages
     avg_duration_ms = Column(Float)
     p50_duration_ms = Column(Float)
     p95_duration_ms = Column(Float)
     p99_duration_ms = Column(Float)
     
+    cost_count = Column(Integer, default=0)
     total_cost = Column(Float, default=0)
     total_input_tokens = Column(Integer, default=0)
     total_output_tokens = Column(Integer, default=0)
     
     __table_args__ = (
         Index("ix_agg_bucket_agent", "bucket_start", "agent_id"),
+        # Readers and the rollup watermark always filter on one bucket size
+        Index("ix_agg_size_bucket", "bucket_size", "bucket_start"),
+    )
+
+
+class RollupDirtyBucket(Base):
+    """A bucket that may already be rolled up and has since received writes."""
+    __tablename__ = "rollup_dirty_buckets"
+    
+    # One row per bucket per writing request; the rollup collapses duplicates
+    id = Column(Uuid(as_uuid=False), primary_key=True)
+    bucket_start = Column(DateTime, nullable=False)
+    bucket_size = Column(String(10), nullable=False)
+    marked_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_rollup_dirty_size_marked", "bucket_size", "marked_at"),
     )
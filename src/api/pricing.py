@@ -0,0 +1,67 @@
+"""
+AgentWatch Model Pricing
+
+Token pricing used to attribute cost to LLM calls.
+"""
+
+from typing import List
+
+import numpy as np
+
+
+# Model pricing (cost per 1K tokens)
+MODEL_PRICING = {
+    "claude-3-opus": {"input": 0.015, "output": 0.075},
+    "claude-3-sonnet": {"input": 0.003, "output": 0.015},
+    "claude-3-haiku": {"input": 0.00025, "output": 0.00125},
+    "claude-3-5-sonnet": {"input": 0.003, "output": 0.015},
+    "gpt-4": {"input": 0.03, "output": 0.06},
+    "gpt-4-turbo": {"input": 0.01, "output": 0.03},
+    "gpt-4o": {"input": 0.005, "output": 0.015},
+    "gpt-3.5-turbo": {"input": 0.0005, "output": 0.0015},
+    "gemini-pro": {"input": 0.00025, "output": 0.0005},
+    "gemini-1.5-pro": {"input": 0.00125, "output": 0.005},
+}
+
+
+# Per-token (input, output) prices, precomputed so cost calculation on the
+# ingest path is two multiplications and a single dict lookup
+_PRICE_PER_TOKEN = {
+    model: (pricing["input"] / 1000, pricing["output"] / 1000)
+    for model, pricing in MODEL_PRICING.items()
+}
+_DEFAULT_PRICE_PER_TOKEN = (0.001 / 1000, 0.002 / 1000)
+
+# Dense (n_models + 1, 2) price table for bulk pricing; the last row is the default
+_MODEL_ROWS = {model: row for row, model in enumerate(_PRICE_PER_TOKEN)}
+_PRICE_TABLE = np.array([*_PRICE_PER_TOKEN.values(), _DEFAULT_PRICE_PER_TOKEN], dtype=np.float64)
+
+# Below this many rows the per-call path is faster than building arrays
+BULK_PRICING_MIN_ROWS = 64
+
+
+def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Calculate cost based on model and token counts."""
+    input_price, output_price = _PRICE_PER_TOKEN.get(model, _DEFAULT_PRICE_PER_TOKEN)
+    return round(input_tokens * input_price + output_tokens * output_price, 6)
+
+
+def calculate_costs(models: List[str], input_tokens: List[int], output_tokens: List[int]) -> List[float]:
+    """
+    Price many LLM calls at once.
+    
+    Batches below BULK_PRICING_MIN_ROWS go through calculate_cost; larger ones
+    are priced with one vectorised NumPy pass over a dense price table.
+    Amounts are rounded exactly as calculate_cost rounds them.
+    """
+    if len(models) < BULK_PRICING_MIN_ROWS:
+        return [calculate_cost(*args) for args in zip(models, input_tokens, output_tokens)]
+    
+    default_row = len(_MODEL_ROWS)
+    rows = np.fromiter((_MODEL_ROWS.get(m, default_row) for m in models), dtype=np.intp, count=len(models))
+    prices = _PRICE_TABLE[rows]
+    costs = (
+        np.asarray(input_tokens, dtype=np.float64) * prices[:, 0]
+        + np.asarray(output_tokens, dtype=np.float64) * prices[:, 1]
+    )
+    return [round(cost, 6) for cost in costs.tolist()]
@@ -0,0 +1,309 @@
+"""
+AgentWatch Metrics Rollup
+
+Background aggregation of raw telemetry into AggregatedMetrics buckets, so
+dashboard queries scan O(buckets) rows instead of O(events).
+
+Each metric family is rolled up at its own bucket size, which also keeps the
+families apart in the table. A family's watermark is the end of its latest
+bucket; readers answer whole buckets before the watermark from the rollup
+and everything else (partial leading bucket, not-yet-rolled tail) from the
+raw tables.
+
+Rows that land in a bucket which may already be rolled up (a trace started
+long before it is sent, or completed more than TRACE_SETTLE after it
+started) are flagged by the writer with mark_late_traces(), and the next
+pass rolls those buckets up again. Until then they are missing from
+analytics. Costs are bucketed by their arrival time, so they never land
+behind the watermark and need no flagging.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple, Iterable
+
+from sqlalchemy import select, insert, func, and_, or_, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import async_session_factory
+from .models import Trace, Cost, AggregatedMetrics, RollupDirtyBucket
+
+
+# Costs are rolled up into 1-minute buckets per (agent, category), traces
+# into hourly buckets per (agent, environment, task type)
+COST_BUCKET = "1m"
+TRACE_BUCKET = "1h"
+
+BUCKET_SIZES = {
+    "1m": timedelta(minutes=1),
+    "1h": timedelta(hours=1),
+}
+_STRFTIME_FORMATS = {
+    "1m": "%Y-%m-%d %H:%M:00",
+    "1h": "%Y-%m-%d %H:00:00",
+}
+_DATE_TRUNC_UNITS = {
+    "1m": "minute",
+    "1h": "hour",
+}
+
+# How often the background task runs, and how long a bucket must have been
+# closed before it is rolled up (lets in-flight transactions land first)
+ROLLUP_INTERVAL_S = 60
+ROLLUP_SETTLE = timedelta(seconds=30)
+
+# Traces are bucketed by start time but keep changing until they complete,
+# so their buckets are only rolled up once traces in them have had an hour
+# to finish
+TRACE_SETTLE = timedelta(hours=1)
+
+
+def bucket_expr(column, bucket_size: str, dialect: str):
+    """SQL expression truncating a timestamp column to its bucket."""
+    if dialect == "sqlite":
+        return func.strftime(_STRFTIME_FORMATS[bucket_size], column)
+    return func.date_trunc(_DATE_TRUNC_UNITS[bucket_size], column)
+
+
+def floor_bucket(ts: datetime, bucket_size: str) -> datetime:
+    """Start of the bucket containing `ts`."""
+    ts = ts.replace(second=0, microsecond=0)
+    if bucket_size == "1h":
+        ts = ts.replace(minute=0)
+    return ts
+
+
+def ceil_bucket(ts: datetime, bucket_size: str) -> datetime:
+    """Start of the first bucket at or after `ts`."""
+    start = floor_bucket(ts, bucket_size)
+    return start if start == ts else start + BUCKET_SIZES[bucket_size]
+
+
+def _as_datetime(value) -> datetime:
+    """Bucket values come back as strings on SQLite, datetimes elsewhere."""
+    if isinstance(value, str):
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return value
+
+
+async def rollup_mark(db: AsyncSession, bucket_size: str) -> Optional[datetime]:
+    """End of the latest rolled-up bucket, or None if nothing is rolled up yet."""
+    latest = await db.execute(
+        select(func.max(AggregatedMetrics.bucket_start))
+        .where(AggregatedMetrics.bucket_size == bucket_size)
+    )
+    latest = latest.scalar()
+    return latest + BUCKET_SIZES[bucket_size] if latest else None
+
+
+def rolled_range(
+    since: datetime,
+    mark: Optional[datetime],
+    bucket_size: str
+) -> Optional[Tuple[datetime, datetime]]:
+    """The [start, end) part of a query window answerable from rollups."""
+    start = ceil_bucket(since, bucket_size)
+    if mark is None or mark <= start:
+        return None
+    return start, mark
+
+
+def raw_condition(column, since: datetime, rolled: Optional[Tuple[datetime, datetime]]):
+    """Filter for the raw rows of a window that are not covered by rollups."""
+    if rolled is None:
+        return column >= since
+    start, end = rolled
+    return and_(column >= since, or_(column < start, column >= end))
+
+
+def rollup_condition(bucket_size: str, rolled: Tuple[datetime, datetime], agent_id: Optional[str] = None):
+    """Filter for the rollup rows covering a rolled range."""
+    conditions = [
+        AggregatedMetrics.bucket_size == bucket_size,
+        AggregatedMetrics.bucket_start >= rolled[0],
+        AggregatedMetrics.bucket_start < rolled[1]
+    ]
+    if agent_id:
+        conditions.append(AggregatedMetrics.agent_id == agent_id)
+    return and_(*conditions)
+
+
+async def _rollup_window(
+    db: AsyncSession,
+    bucket_size: str,
+    timestamp_column,
+    until: datetime
+) -> Optional[Tuple[datetime, datetime]]:
+    """The [start, end) range of complete buckets not yet rolled up."""
+    start = await rollup_mark(db, bucket_size)
+    if start is None:
+        first = await db.execute(select(func.min(timestamp_column)))
+        first = first.scalar()
+        if first is None:
+            return None
+        start = floor_bucket(first, bucket_size)
+
+    # Never roll up an open bucket, or rows landing in it later would be lost
+    end = floor_bucket(min(until, datetime.utcnow()), bucket_size)
+    if end <= start:
+        return None
+    return start, end
+
+
+async def _replace_buckets(db: AsyncSession, bucket_size: str, start: datetime, end: datetime, rows: list):
+    """Write rollup rows for [start, end), replacing any already there."""
+    # Replace rather than add, so re-running over a range is idempotent
+    await db.execute(
+        delete(AggregatedMetrics).where(and_(
+            AggregatedMetrics.bucket_size == bucket_size,
+            AggregatedMetrics.bucket_start >= start,
+            AggregatedMetrics.bucket_start < end
+        ))
+    )
+    db.add_all(rows)
+    await db.flush()
+
+
+async def rollup_costs(db: AsyncSession, until: datetime) -> int:
+    """Roll up costs in complete buckets before `until`. Returns rows written."""
+    window = await _rollup_window(db, COST_BUCKET, Cost.timestamp, until)
+    if window is None:
+        return 0
+    start, end = window
+
+    bucket = bucket_expr(Cost.timestamp, COST_BUCKET, db.bind.dialect.name)
+    result = await db.execute(
+        select(
+            bucket.label("bucket"),
+            Trace.agent_id,
+            Cost.category,
+            func.sum(Cost.amount).label("total_cost"),
+            func.count(Cost.id).label("cost_count"),
+            func.sum(Cost.input_tokens).label("input_tokens"),
+            func.sum(Cost.output_tokens).label("output_tokens")
+        )
+        .outerjoin(Trace, Cost.trace_id == Trace.id)
+        .where(and_(Cost.timestamp >= start, Cost.timestamp < end))
+        .group_by(bucket, Trace.agent_id, Cost.category)
+    )
+
+    rows = [
+        AggregatedMetrics(
+            id=uuid.uuid4().hex,
+            bucket_start=_as_datetime(row.bucket),
+            bucket_size=COST_BUCKET,
+            agent_id=row.agent_id,
+            category=row.category,
+            cost_count=row.cost_count,
+            total_cost=float(row.total_cost or 0),
+            total_input_tokens=row.input_tokens or 0,
+            total_output_tokens=row.output_tokens or 0
+        )
+        for row in result
+    ]
+    await _replace_buckets(db, COST_BUCKET, start, end, rows)
+    return len(rows)
+
+
+async def rollup_traces(db: AsyncSession, until: datetime) -> int:
+    """Roll up traces started in complete buckets before `until`. Returns rows written."""
+    window = await _rollup_window(db, TRACE_BUCKET, Trace.started_at, until)
+    if window is None:
+        return 0
+    return await _rollup_trace_range(db, *window)
+
+
+async def _rollup_trace_range(db: AsyncSession, start: datetime, end: datetime) -> int:
+    """(Re)write the trace rollups for [start, end). Returns rows written."""
+    bucket = bucket_expr(Trace.started_at, TRACE_BUCKET, db.bind.dialect.name)
+    result = await db.execute(
+        select(
+            bucket.label("bucket"),
+            Trace.agent_id,
+            Trace.environment,
+            Trace.task_type,
+            func.count(Trace.id).label("trace_count"),
+            func.count(Trace.id).filter(Trace.status == "success").label("success_count"),
+            func.count(Trace.id).filter(Trace.status == "error").label("error_count"),
+            func.sum(Trace.duration_ms).label("total_duration_ms"),
+            func.count(Trace.duration_ms).label("duration_count")
+        )
+        .where(and_(Trace.started_at >= start, Trace.started_at < end))
+        .group_by(bucket, Trace.agent_id, Trace.environment, Trace.task_type)
+    )
+
+    rows = [
+        AggregatedMetrics(
+            id=uuid.uuid4().hex,
+            bucket_start=_as_datetime(row.bucket),
+            bucket_size=TRACE_BUCKET,
+            agent_id=row.agent_id,
+            environment=row.environment,
+            task_type=row.task_type,
+            trace_count=row.trace_count,
+            success_count=row.success_count or 0,
+            error_count=row.error_count or 0,
+            total_duration_ms=row.total_duration_ms or 0,
+            duration_count=row.duration_count,
+            avg_duration_ms=row.total_duration_ms / row.duration_count if row.duration_count else None
+        )
+        for row in result
+    ]
+    await _replace_buckets(db, TRACE_BUCKET, start, end, rows)
+    return len(rows)
+
+
+async def mark_late_traces(db: AsyncSession, started_ats: Iterable[datetime]):
+    """
+    Flag the trace buckets of these start times that may already be rolled up.
+    
+    Called by writers that create or complete traces. Buckets are only
+    rolled up once they are TRACE_SETTLE old, so anything newer is skipped
+    without a query, and live traffic writes nothing here.
+    """
+    now = datetime.utcnow()
+    settled = floor_bucket(now - TRACE_SETTLE, TRACE_BUCKET)
+    buckets = {floor_bucket(ts, TRACE_BUCKET) for ts in started_ats if ts is not None and ts < settled}
+    if buckets:
+        await db.execute(insert(RollupDirtyBucket), [
+            dict(id=uuid.uuid4().hex, bucket_start=bucket, bucket_size=TRACE_BUCKET, marked_at=now)
+            for bucket in buckets
+        ])
+
+
+async def rollup_late_traces(db: AsyncSession, until: datetime) -> int:
+    """Roll up again the trace buckets flagged before `until`. Returns buckets redone."""
+    flagged = and_(RollupDirtyBucket.bucket_size == TRACE_BUCKET, RollupDirtyBucket.marked_at < until)
+    result = await db.execute(select(RollupDirtyBucket.bucket_start).where(flagged).distinct())
+    starts = [_as_datetime(start) for start in result.scalars()]
+    if not starts:
+        return 0
+    
+    # Buckets past the watermark get rolled up with their late rows anyway
+    mark = await rollup_mark(db, TRACE_BUCKET)
+    redone = [start for start in starts if mark is not None and start < mark]
+    for start in redone:
+        await _rollup_trace_range(db, start, start + BUCKET_SIZES[TRACE_BUCKET])
+    await db.execute(delete(RollupDirtyBucket).where(flagged))
+    return len(redone)
+
+
+async def rollup_once(db: AsyncSession, now: datetime):
+    """One rollup pass: settled buckets past each watermark, then flagged ones."""
+    await rollup_costs(db, now - ROLLUP_SETTLE)
+    await rollup_traces(db, now - TRACE_SETTLE)
+    # Flags from transactions that may still be in flight wait for the next pass
+    await rollup_late_traces(db, now - ROLLUP_SETTLE)
+
+
+async def rollup_loop(interval_s: float = ROLLUP_INTERVAL_S):
+    """Periodically roll up settled buckets. Runs until cancelled."""
+    while True:
+        try:
+            async with async_session_factory() as session:
+                await rollup_once(session, datetime.utcnow())
+                await session.commit()
+        except Exception as e:
+            print(f"Warning: Metrics rollup failed: {e}")
+        await asyncio.sleep(interval_s)
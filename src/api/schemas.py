@@ -4,9 +4,10 @@ AgentWatch API Schemas (Pydantic)
 Request/response models for the API.
 """
 
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Literal, Annotated
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -31,6 +32,7 @@ class CostCategory(str, Enum):
     TOOL = "tool"
     API = "api"
     COMPUTE = "compute"
+    OTHER = "other"  # The SDK's log_cost() default
 
 
 class Severity(str, Enum):
@@ -47,13 +49,39 @@ class DataClassification(str, Enum):
     RESTRICTED = "restricted"
 
 
+# Literal equivalents of the enums above, used by the request schemas:
+# pydantic-core checks a Literal with a plain lookup, which is cheaper than
+# its enum validator on bulk payloads, and the value stays a str.
+TraceStatusValue = Literal["running", "success", "error", "timeout"]
+EventTypeValue = Literal["tool_call", "llm_call", "decision", "error", "custom"]
+CostCategoryValue = Literal["llm", "tool", "api", "compute", "other"]
+SeverityValue = Literal["info", "warning", "error", "critical"]
+DataClassificationValue = Literal["public", "internal", "confidential", "restricted"]
+
+# Trace IDs sent by clients must parse as UUIDs, since traces live in UUID
+# columns: anything else is a clean 422 instead of a row that can never be
+# looked up again. Valid IDs are normalised to the hex form generated IDs use.
+TraceId = Annotated[uuid.UUID, AfterValidator(lambda value: value.hex)]
+
+# Client timestamps with an offset are converted to the naive UTC the
+# database stores, so they compare and bucket like server timestamps
+UtcDatetime = Annotated[datetime, AfterValidator(
+    lambda value: value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+)]
+
+# Free-form JSON blobs (configs, attributes, payloads) are typed Any: they are
+# stored as-is, so checking every key is wasted work. TraceUpdate.attributes
+# stays a dict because it is merged into the stored attributes key by key.
+
+
 # Agent Schemas
 class AgentCreate(BaseModel):
+    id: Optional[str] = None  # Client-supplied ID; registering an existing ID returns that agent
     name: str
     description: Optional[str] = None
     agent_type: Optional[str] = None
     owner: Optional[str] = None
-    config: Optional[Dict[str, Any]] = None
+    config: Optional[Any] = None
 
 
 class AgentResponse(BaseModel):
@@ -64,30 +92,37 @@ class AgentResponse(BaseModel):
     owner: Optional[str]
     created_at: datetime
     is_active: bool
-    config: Optional[Dict[str, Any]]
+    config: Optional[Any]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Trace Schemas
 class TraceCreate(BaseModel):
+    id: Optional[TraceId] = None  # Client-supplied ID so batched events can reference the trace
     agent_id: str
-    parent_trace_id: Optional[str] = None
+    parent_trace_id: Optional[TraceId] = None
+    started_at: Optional[UtcDatetime] = None  # Client-side start time (UTC); defaults to arrival
     environment: str = "production"
     user_id: Optional[str] = None
     session_id: Optional[str] = None
     task_type: Optional[str] = None
     input_summary: Optional[str] = None
-    attributes: Optional[Dict[str, Any]] = None
+    attributes: Optional[Any] = None
 
 
 class TraceUpdate(BaseModel):
-    status: Optional[TraceStatus] = None
+    status: Optional[TraceStatusValue] = None
     error_message: Optional[str] = None
     error_type: Optional[str] = None
     output_summary: Optional[str] = None
     attributes: Optional[Dict[str, Any]] = None
+    duration_ms: Optional[int] = None  # Client-measured; defaults to time since started_at
+
+
+class TraceCompletion(TraceUpdate):
+    """A trace update addressed by ID, for completing traces in bulk."""
+    id: str
 
 
 class TraceResponse(BaseModel):
@@ -105,25 +140,24 @@ class TraceResponse(BaseModel):
     error_message: Optional[str]
     input_summary: Optional[str]
     output_summary: Optional[str]
-    attributes: Optional[Dict[str, Any]]
+    attributes: Optional[Any]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Event Schemas
 class EventCreate(BaseModel):
-    trace_id: str
-    event_type: EventType
+    trace_id: TraceId
+    event_type: EventTypeValue
     event_name: Optional[str] = None
-    input_data: Optional[Dict[str, Any]] = None
-    output_data: Optional[Dict[str, Any]] = None
+    input_data: Optional[Any] = None
+    output_data: Optional[Any] = None
     duration_ms: Optional[int] = None
     status: Optional[str] = None
     model: Optional[str] = None
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
-    attributes: Optional[Dict[str, Any]] = None
+    attributes: Optional[Any] = None
 
 
 class EventResponse(BaseModel):
@@ -138,16 +172,15 @@ class EventResponse(BaseModel):
     input_tokens: Optional[int]
     output_tokens: Optional[int]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Cost Schemas
 class CostCreate(BaseModel):
-    trace_id: str
+    trace_id: TraceId
     amount: float
     currency: str = "USD"
-    category: CostCategory
+    category: CostCategoryValue
     subcategory: Optional[str] = None
     model: Optional[str] = None
     input_tokens: Optional[int] = None
@@ -166,24 +199,23 @@ class CostResponse(BaseModel):
     model: Optional[str]
     customer_id: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Compliance Schemas
 class ComplianceEventCreate(BaseModel):
-    trace_id: str
+    trace_id: TraceId
     event_type: str
     action: str
     resource: Optional[str] = None
     resource_type: Optional[str] = None
     justification: Optional[str] = None
-    data_classification: Optional[DataClassification] = None
+    data_classification: Optional[DataClassificationValue] = None
     actor_type: str = "agent"
     actor_id: Optional[str] = None
     outcome: str = "allowed"
-    request_data: Optional[Dict[str, Any]] = None
-    response_data: Optional[Dict[str, Any]] = None
+    request_data: Optional[Any] = None
+    response_data: Optional[Any] = None
 
 
 class ComplianceEventResponse(BaseModel):
@@ -197,19 +229,18 @@ class ComplianceEventResponse(BaseModel):
     outcome: str
     justification: Optional[str]
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Alert Schemas
 class AlertCreate(BaseModel):
     alert_type: str
-    severity: Severity
+    severity: SeverityValue
     title: str
     description: Optional[str] = None
     agent_id: Optional[str] = None
-    trace_id: Optional[str] = None
-    details: Optional[Dict[str, Any]] = None
+    trace_id: Optional[TraceId] = None
+    details: Optional[Any] = None
 
 
 class AlertResponse(BaseModel):
@@ -222,8 +253,7 @@ class AlertResponse(BaseModel):
     agent_id: Optional[str]
     status: str
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Analytics Schemas
@@ -270,6 +300,7 @@ class DashboardData(BaseModel):
 class BulkIngestRequest(BaseModel):
     """For high-volume telemetry ingestion."""
     traces: Optional[List[TraceCreate]] = None
+    completions: Optional[List[TraceCompletion]] = None  # Applied after traces are created
     events: Optional[List[EventCreate]] = None
     costs: Optional[List[CostCreate]] = None
     compliance_events: Optional[List[ComplianceEventCreate]] = None
@@ -277,6 +308,7 @@ class BulkIngestRequest(BaseModel):
 
 class BulkIngestResponse(BaseModel):
     traces_created: int = 0
+    traces_completed: int = 0
     events_created: int = 0
     costs_created: int = 0
     compliance_events_created: int = 0
@@ -5,29 +5,177 @@ Serves the monitoring dashboard with real-time updates.
 """
 
 import os
+import re
+import gzip
+import asyncio
+import hashlib
 from pathlib import Path
-from fastapi import FastAPI, Request
+from typing import Optional
+import httpx
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
 import uvicorn
 
 app = FastAPI(title="AgentWatch Dashboard")
 
 # Get the dashboard directory
 DASHBOARD_DIR = Path(__file__).parent
+STATIC_DIR = DASHBOARD_DIR / "static"
+
+# Static assets are linked with a content hash (see static_url), so a URL
+# always names the same bytes and browsers may cache it indefinitely
+STATIC_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+# Text assets are served gzipped to clients that accept it
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that marks responses immutable and gzips text assets.
+    
+    Each file version (keyed by StaticFiles' mtime/size ETag) is compressed
+    once and kept in memory, so repeat requests only copy bytes.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._gzipped = {}
+    
+    async def get_response(self, path: str, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code not in (200, 304):
+            return response
+        response.headers["Cache-Control"] = STATIC_CACHE_CONTROL
+        if response.status_code != 200 or not response.media_type.startswith(COMPRESSIBLE_TYPES):
+            return response
+        
+        response.headers["Vary"] = "Accept-Encoding"
+        request_headers = Headers(scope=scope)
+        if "gzip" not in request_headers.get("accept-encoding", ""):
+            return response
+        
+        # Range requests are only served for the identity encoding
+        etag = response.headers["etag"]
+        headers = {
+            k: v for k, v in response.headers.items()
+            if k not in ("content-length", "accept-ranges")
+        }
+        headers["etag"] = etag[:-1] + '-gzip"'
+        headers["content-encoding"] = "gzip"
+        if request_headers.get("if-none-match") == headers["etag"]:
+            headers.pop("content-type", None)
+            return Response(status_code=304, headers=headers)
+        
+        body = self._gzipped.get((response.path, etag))
+        if body is None:
+            body = gzip.compress(Path(response.path).read_bytes(), compresslevel=9, mtime=0)
+            self._gzipped[(response.path, etag)] = body
+        return Response(body, headers=headers)
+
+
+def static_url(name: str) -> str:
+    """URL of a static asset, versioned by its content."""
+    digest = hashlib.md5((STATIC_DIR / name).read_bytes()).hexdigest()[:12]
+    return f"/static/{name}?v={digest}"
+
 
 # Serve static files
-if (DASHBOARD_DIR / "static").exists():
-    app.mount("/static", StaticFiles(directory=DASHBOARD_DIR / "static"), name="static")
+if STATIC_DIR.exists():
+    app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
+
+
+# Browsers may reuse the page for this long before revalidating with the ETag
+DASHBOARD_MAX_AGE_S = 60
 
 
 @app.get("/", response_class=HTMLResponse)
-async def dashboard():
+async def dashboard(request: Request):
     """Serve the main dashboard."""
-    html_path = DASHBOARD_DIR / "index.html"
-    if html_path.exists():
-        return html_path.read_text()
-    return get_embedded_dashboard()
+    encoding = "gzip" if "gzip" in request.headers.get("accept-encoding", "") else "identity"
+    body, headers = _DASHBOARD_VARIANTS[encoding]
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(body, headers=headers)
+
+
+# ============================================================================
+# Live Updates
+# ============================================================================
+
+API_URL = os.getenv("AGENTWATCH_API_URL", "http://localhost:8765")
+PUSH_INTERVAL_S = 10
+
+
+
+class DashboardHub:
+    """
+    Fans dashboard data out to every connected WebSocket.
+    
+    One poller fetches /api/dashboard per interval on behalf of all open
+    tabs, so backend load no longer grows with the number of viewers. Each
+    section whose data changed is pushed as a frame of its own, followed by
+    a "refreshed" frame.
+    """
+    
+    def __init__(self, api_url: str, interval_s: float):
+        self.api_url = api_url
+        self.interval_s = interval_s
+        self.clients = set()
+        self.latest = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    async def connect(self, websocket: WebSocket):
+        """Accept a client, send it the latest data, and start polling if idle."""
+        await websocket.accept()
+        for frame_type, payload in self.latest.items():
+            await websocket.send_json({"type": frame_type, "payload": payload})
+        self.clients.add(websocket)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+    
+    def disconnect(self, websocket: WebSocket):
+        self.clients.discard(websocket)
+    
+    async def _broadcast(self, frame: dict):
+        for websocket in list(self.clients):
+            try:
+                await websocket.send_json(frame)
+            except Exception:
+                self.clients.discard(websocket)
+    
+    async def _poll(self):
+        """Poll the API while anyone is connected."""
+        async with httpx.AsyncClient(base_url=self.api_url, timeout=10.0) as client:
+            while self.clients:
+                try:
+                    response = await client.get("/api/dashboard")
+                    response.raise_for_status()
+                    for frame_type, payload in response.json().items():
+                        if self.latest.get(frame_type) != payload:
+                            self.latest[frame_type] = payload
+                            await self._broadcast({"type": frame_type, "payload": payload})
+                    await self._broadcast({"type": "refreshed", "payload": None})
+                except httpx.HTTPError as e:
+                    print(f"Warning: Dashboard refresh failed: {e}")
+                await asyncio.sleep(self.interval_s)
+
+
+hub = DashboardHub(API_URL, PUSH_INTERVAL_S)
+
+
+@app.websocket("/ws/dashboard")
+async def dashboard_updates(websocket: WebSocket):
+    """Push dashboard data as it changes."""
+    await hub.connect(websocket)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        hub.disconnect(websocket)
 
 
 def get_embedded_dashboard():
@@ -39,11 +187,10 @@ def get_embedded_dashboard():
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>AgentWatch - AI Agent Observability</title>
-    <script src="https://cdn.tailwindcss.com"></script>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap" rel="stylesheet">
+    <link href="/static/tailwind.css" rel="stylesheet">
+    <script src="https://cdn.jsdelivr.net/npm/chart.js@4/dist/chart.umd.min.js" defer></script>
     <style>
-        body { font-family: 'Inter', sans-serif; }
+        body { font-family: 'Inter', ui-sans-serif, system-ui, -apple-system, 'Segoe UI', Roboto, sans-serif; }
         .gradient-bg { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }
         .card { background: white; border-radius: 12px; box-shadow: 0 4px 6px -1px rgba(0,0,0,0.1); }
         .metric-card { transition: transform 0.2s; }
@@ -251,135 +398,136 @@ def get_embedded_dashboard():
             });
         }
 
-        // Fetch and update summary
-        async function updateSummary() {
-            try {
-                const res = await fetch(`${API_BASE}/api/analytics/summary`);
-                const data = await res.json();
-                
-                document.getElementById('totalTraces').textContent = data.total_traces.toLocaleString();
-                document.getElementById('successRate').textContent = data.success_rate + '%';
-                document.getElementById('errorCount').textContent = data.error_count + ' errors';
-                document.getElementById('avgDuration').textContent = (data.avg_duration_ms / 1000).toFixed(2) + 's';
-                document.getElementById('totalCost').textContent = '$' + data.total_cost.toFixed(2);
-                document.getElementById('tokenCount').textContent = (data.total_input_tokens + data.total_output_tokens).toLocaleString() + ' tokens';
-            } catch (e) {
-                console.error('Failed to fetch summary:', e);
-            }
+        // Render summary cards
+        function renderSummary(data) {
+            document.getElementById('totalTraces').textContent = data.total_traces.toLocaleString();
+            document.getElementById('successRate').textContent = data.success_rate + '%';
+            document.getElementById('errorCount').textContent = data.error_count + ' errors';
+            document.getElementById('avgDuration').textContent = (data.avg_duration_ms / 1000).toFixed(2) + 's';
+            document.getElementById('totalCost').textContent = '$' + data.total_cost.toFixed(2);
+            document.getElementById('tokenCount').textContent = (data.total_input_tokens + data.total_output_tokens).toLocaleString() + ' tokens';
         }
 
-        // Fetch and update time series
-        async function updateTimeSeries() {
-            try {
-                const [tracesRes, costRes] = await Promise.all([
-                    fetch(`${API_BASE}/api/analytics/timeseries?metric=traces`),
-                    fetch(`${API_BASE}/api/analytics/timeseries?metric=cost`)
-                ]);
-                
-                const tracesData = await tracesRes.json();
-                const costData = await costRes.json();
-
-                // Update traces chart
-                tracesChart.data.labels = tracesData.map(d => new Date(d.timestamp).toLocaleTimeString());
-                tracesChart.data.datasets[0].data = tracesData.map(d => d.value);
-                tracesChart.update();
-
-                // Update cost chart
-                costChart.data.labels = costData.map(d => new Date(d.timestamp).toLocaleTimeString());
-                costChart.data.datasets[0].data = costData.map(d => d.value);
-                costChart.update();
-            } catch (e) {
-                console.error('Failed to fetch time series:', e);
+        // Render a time series into a chart. Points still in the window keep
+        // their formatted labels and only their values are refreshed; new
+        // points are appended, and the redraw skips animations.
+        function renderSeries(chart, data) {
+            const timestamps = chart.$timestamps || (chart.$timestamps = []);
+            const labels = chart.data.labels;
+            const values = chart.data.datasets[0].data;
+
+            // Drop points that slid out of the window
+            let stale = 0;
+            while (data.length && stale < timestamps.length && timestamps[stale] < data[0].timestamp) stale++;
+            [timestamps, labels, values].forEach(a => a.splice(0, stale));
+
+            // Update matching points, then replace everything after them
+            let i = 0;
+            while (i < data.length && timestamps[i] === data[i].timestamp) {
+                values[i] = data[i].value;
+                i++;
+            }
+            [timestamps, labels, values].forEach(a => a.splice(i));
+            for (const point of data.slice(i)) {
+                timestamps.push(point.timestamp);
+                labels.push(new Date(point.timestamp).toLocaleTimeString());
+                values.push(point.value);
             }
+            chart.update('none');
         }
 
-        // Fetch and update agent table
-        async function updateAgentTable() {
-            try {
-                const res = await fetch(`${API_BASE}/api/analytics/agents`);
-                const agents = await res.json();
-                
-                const tbody = document.getElementById('agentTable');
-                if (agents.length === 0) {
-                    tbody.innerHTML = '<tr><td colspan="4" class="py-4 text-center text-gray-500">No agents registered</td></tr>';
-                    return;
-                }
-                
-                tbody.innerHTML = agents.map(agent => `
-                    <tr class="border-b last:border-0">
-                        <td class="py-3">
-                            <span class="font-medium text-gray-900">${agent.agent_name}</span>
-                        </td>
-                        <td class="py-3 text-gray-600">${agent.trace_count}</td>
-                        <td class="py-3">
-                            <span class="px-2 py-1 text-sm rounded-full ${agent.success_rate >= 95 ? 'bg-green-100 text-green-800' : agent.success_rate >= 80 ? 'bg-yellow-100 text-yellow-800' : 'bg-red-100 text-red-800'}">
-                                ${agent.success_rate}%
-                            </span>
-                        </td>
-                        <td class="py-3 text-gray-600">${(agent.avg_duration_ms / 1000).toFixed(2)}s</td>
-                    </tr>
-                `).join('');
-            } catch (e) {
-                console.error('Failed to fetch agents:', e);
-            }
+        // Class lookups, built once rather than per row
+        const SUCCESS_RATE_CLASSES = {
+            good: 'bg-green-100 text-green-800',
+            fair: 'bg-yellow-100 text-yellow-800',
+            poor: 'bg-red-100 text-red-800'
+        };
+        const SEVERITY_CLASSES = {
+            critical: { box: 'bg-red-50 border border-red-200', icon: 'text-red-500' },
+            error: { box: 'bg-orange-50 border border-orange-200', icon: 'text-yellow-500' },
+            other: { box: 'bg-yellow-50 border border-yellow-200', icon: 'text-yellow-500' }
+        };
+
+        function successRateClass(rate) {
+            return SUCCESS_RATE_CLASSES[rate >= 95 ? 'good' : rate >= 80 ? 'fair' : 'poor'];
         }
 
-        // Fetch and update activity feed
-        async function updateActivityFeed() {
-            try {
-                const res = await fetch(`${API_BASE}/api/traces?limit=10`);
-                const traces = await res.json();
-                
-                const feed = document.getElementById('activityFeed');
-                if (traces.length === 0) {
-                    feed.innerHTML = '<div class="text-center text-gray-500 py-4">No recent activity</div>';
-                    return;
+        // Render rows keyed by id, reusing the DOM node of any row whose
+        // markup is unchanged, so only new or changed rows are parsed
+        const rowTemplate = document.createElement('template');
+
+        function renderRows(container, items, key, markup, emptyHtml) {
+            const previous = container.$rows || new Map();
+            const rows = new Map();
+            container.$rows = rows;
+            if (items.length === 0) {
+                container.innerHTML = emptyHtml;
+                return;
+            }
+
+            container.replaceChildren(...items.map(item => {
+                const html = markup(item).trim();
+                let row = previous.get(key(item));
+                if (!row || row.html !== html) {
+                    rowTemplate.innerHTML = html;
+                    row = { html, node: rowTemplate.content.firstElementChild };
                 }
-                
-                feed.innerHTML = traces.map(trace => `
-                    <div class="flex items-center space-x-3 p-2 hover:bg-gray-50 rounded-lg">
-                        <div class="status-dot status-${trace.status}"></div>
-                        <div class="flex-1 min-w-0">
-                            <p class="text-sm font-medium text-gray-900 truncate">${trace.task_type || 'Task'}</p>
-                            <p class="text-xs text-gray-500">${new Date(trace.started_at).toLocaleTimeString()}</p>
-                        </div>
-                        <span class="text-xs text-gray-400">${trace.duration_ms ? (trace.duration_ms / 1000).toFixed(1) + 's' : '...'}</span>
+                rows.set(key(item), row);
+                return row.node;
+            }));
+        }
+
+        // Render agent table
+        function renderAgentTable(agents) {
+            renderRows(document.getElementById('agentTable'), agents, agent => agent.agent_id, agent => `
+                <tr class="border-b last:border-0">
+                    <td class="py-3">
+                        <span class="font-medium text-gray-900">${agent.agent_name}</span>
+                    </td>
+                    <td class="py-3 text-gray-600">${agent.trace_count}</td>
+                    <td class="py-3">
+                        <span class="px-2 py-1 text-sm rounded-full ${successRateClass(agent.success_rate)}">
+                            ${agent.success_rate}%
+                        </span>
+                    </td>
+                    <td class="py-3 text-gray-600">${(agent.avg_duration_ms / 1000).toFixed(2)}s</td>
+                </tr>
+            `, '<tr><td colspan="4" class="py-4 text-center text-gray-500">No agents registered</td></tr>');
+        }
+
+        // Render activity feed
+        function renderActivityFeed(traces) {
+            renderRows(document.getElementById('activityFeed'), traces, trace => trace.id, trace => `
+                <div class="flex items-center space-x-3 p-2 hover:bg-gray-50 rounded-lg">
+                    <div class="status-dot status-${trace.status}"></div>
+                    <div class="flex-1 min-w-0">
+                        <p class="text-sm font-medium text-gray-900 truncate">${trace.task_type || 'Task'}</p>
+                        <p class="text-xs text-gray-500">${new Date(trace.started_at).toLocaleTimeString()}</p>
                     </div>
-                `).join('');
-            } catch (e) {
-                console.error('Failed to fetch activity:', e);
-            }
+                    <span class="text-xs text-gray-400">${trace.duration_ms ? (trace.duration_ms / 1000).toFixed(1) + 's' : '...'}</span>
+                </div>
+            `, '<div class="text-center text-gray-500 py-4">No recent activity</div>');
         }
 
-        // Fetch and update alerts
-        async function updateAlerts() {
-            try {
-                const res = await fetch(`${API_BASE}/api/alerts?status=open&limit=5`);
-                const alerts = await res.json();
-                
-                const container = document.getElementById('alertsContainer');
-                if (alerts.length === 0) {
-                    container.innerHTML = '<div class="text-center text-gray-500 py-4">No active alerts ✓</div>';
-                    return;
-                }
-                
-                container.innerHTML = alerts.map(alert => `
-                    <div class="flex items-center justify-between p-4 rounded-lg ${alert.severity === 'critical' ? 'bg-red-50 border border-red-200' : alert.severity === 'error' ? 'bg-orange-50 border border-orange-200' : 'bg-yellow-50 border border-yellow-200'}">
-                        <div class="flex items-center space-x-3">
-                            <svg class="w-5 h-5 ${alert.severity === 'critical' ? 'text-red-500' : 'text-yellow-500'}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
-                            </svg>
-                            <div>
-                                <p class="font-medium text-gray-900">${alert.title}</p>
-                                <p class="text-sm text-gray-600">${alert.description || ''}</p>
-                            </div>
+        // Render alerts
+        function renderAlerts(alerts) {
+            renderRows(document.getElementById('alertsContainer'), alerts, alert => alert.id, alert => {
+                const severity = SEVERITY_CLASSES[alert.severity] || SEVERITY_CLASSES.other;
+                return `
+                <div class="flex items-center justify-between p-4 rounded-lg ${severity.box}">
+                    <div class="flex items-center space-x-3">
+                        <svg class="w-5 h-5 ${severity.icon}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                            <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M12 9v2m0 4h.01m-6.938 4h13.856c1.54 0 2.502-1.667 1.732-3L13.732 4c-.77-1.333-2.694-1.333-3.464 0L3.34 16c-.77 1.333.192 3 1.732 3z"/>
+                        </svg>
+                        <div>
+                            <p class="font-medium text-gray-900">${alert.title}</p>
+                            <p class="text-sm text-gray-600">${alert.description || ''}</p>
                         </div>
-                        <span class="text-xs text-gray-500">${new Date(alert.timestamp).toLocaleTimeString()}</span>
                     </div>
-                `).join('');
-            } catch (e) {
-                console.error('Failed to fetch alerts:', e);
-            }
+                    <span class="text-xs text-gray-500">${new Date(alert.timestamp).toLocaleTimeString()}</span>
+                </div>
+            `;
+            }, '<div class="text-center text-gray-500 py-4">No active alerts ✓</div>');
         }
 
         // Update timestamp
@@ -387,25 +535,80 @@ def get_embedded_dashboard():
             document.getElementById('lastUpdate').textContent = 'Last update: ' + new Date().toLocaleTimeString();
         }
 
-        // Refresh all data
+        // Refresh all data with one request
         async function refreshAll() {
-            await Promise.all([
-                updateSummary(),
-                updateTimeSeries(),
-                updateAgentTable(),
-                updateActivityFeed(),
-                updateAlerts()
-            ]);
-            updateTimestamp();
+            try {
+                const res = await fetch(`${API_BASE}/api/dashboard`);
+                const sections = await res.json();
+                for (const [type, payload] of Object.entries(sections)) {
+                    renderers[type](payload);
+                }
+                updateTimestamp();
+            } catch (e) {
+                console.error('Failed to fetch dashboard:', e);
+            }
         }
 
+        // Live updates pushed by the dashboard server; each frame carries one
+        // section's data, sent only when it changed
+        const renderers = {
+            summary: renderSummary,
+            traces_timeseries: data => renderSeries(tracesChart, data),
+            cost_timeseries: data => renderSeries(costChart, data),
+            agents: renderAgentTable,
+            traces: renderActivityFeed,
+            alerts: renderAlerts,
+            refreshed: updateTimestamp
+        };
+
+        let socket = null;
+        let reconnectTimer = null;
+
+        function connectLive() {
+            const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+            socket = new WebSocket(`${scheme}://${location.host}/ws/dashboard`);
+            socket.onmessage = (message) => {
+                const frame = JSON.parse(message.data);
+                const render = renderers[frame.type];
+                if (render) render(frame.payload);
+            };
+            // Fall back to one poll, then reconnect, if the stream drops. The
+            // delay is jittered so tabs dropped together don't return in step.
+            socket.onclose = () => {
+                socket = null;
+                reconnectTimer = setTimeout(() => {
+                    refreshAll();
+                    connectLive();
+                }, 10000 + Math.random() * 1000);
+            };
+        }
+
+        // Hidden tabs drop their stream, so the server stops polling the API
+        // when no dashboard is on screen; a tab coming back repaints at once
+        function disconnectLive() {
+            clearTimeout(reconnectTimer);
+            if (socket) {
+                socket.onclose = null;
+                socket.close();
+                socket = null;
+            }
+        }
+
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) {
+                disconnectLive();
+            } else if (!socket) {
+                clearTimeout(reconnectTimer);
+                refreshAll();
+                connectLive();
+            }
+        });
+
         // Initialize
         document.addEventListener('DOMContentLoaded', () => {
             initCharts();
             refreshAll();
-            
-            // Refresh every 10 seconds
-            setInterval(refreshAll, 10000);
+            if (!document.hidden) connectLive();
         });
     </script>
 </body>
@@ -413,5 +616,56 @@ def get_embedded_dashboard():
 """
 
 
+def load_dashboard() -> str:
+    """The dashboard page: index.html if present, else the embedded copy."""
+    html_path = DASHBOARD_DIR / "index.html"
+    html = html_path.read_text() if html_path.exists() else get_embedded_dashboard()
+    return html.replace("/static/tailwind.css", static_url("tailwind.css"))
+
+
+def minify_html(html: str) -> str:
+    """
+    Strip HTML comments, indentation and blank lines.
+    
+    Line breaks are kept, so inline scripts still parse exactly as written
+    (no reliance on semicolon insertion across joined lines).
+    """
+    html = re.sub(r"<!--.*?-->", "", html, flags=re.DOTALL)
+    return "\n".join(line.strip() for line in html.splitlines() if line.strip())
+
+
+def dashboard_variants(html: str) -> dict:
+    """The page body and headers for each content encoding, keyed by encoding."""
+    body = html.encode()
+    etag = hashlib.md5(body).hexdigest()
+    headers = {
+        "Cache-Control": f"public, max-age={DASHBOARD_MAX_AGE_S}",
+        "Vary": "Accept-Encoding"
+    }
+    return {
+        "identity": (body, {**headers, "ETag": f'"{etag}"'}),
+        "gzip": (
+            gzip.compress(body, compresslevel=9, mtime=0),
+            {**headers, "ETag": f'"{etag}-gzip"', "Content-Encoding": "gzip"}
+        )
+    }
+
+
+# The page is static, so it is read, minified, encoded and compressed once
+# at import rather than per request; edits to index.html need a restart
+_DASHBOARD_VARIANTS = dashboard_variants(minify_html(load_dashboard()))
+
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8766)
+    import sys
+    # Both ship with uvicorn[standard]; uvloop has no Windows build. One
+    # worker is enough for a cached page and one WebSocket per tab, and
+    # keeps a single poller hitting the API.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8766,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        access_log=False
+    )
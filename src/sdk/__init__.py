@@ -13,8 +13,8 @@ Usage:
         span.log_llm_call(model="claude-3", input_tokens=100, output_tokens=200)
 """
 
-from .client import AgentWatch
+from .client import AgentWatch, current_span
 from .span import Span
 
-__all__ = ["AgentWatch", "Span"]
+__all__ = ["AgentWatch", "Span", "current_span"]
 __version__ = "0.1.0"
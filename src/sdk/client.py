@@ -5,31 +5,165 @@ Main client for sending telemetry to AgentWatch.
 """
 
 import os
+import time
 import uuid
+import atexit
+import asyncio
+import inspect
+import weakref
+import functools
+import threading
+import collections
+import importlib.util
+import concurrent.futures.thread
 import httpx
-from datetime import datetime
-from typing import Optional, Dict, Any, List
-from contextlib import contextmanager
+import orjson
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Tuple
+from contextlib import ContextDecorator
+from contextvars import ContextVar
 from dataclasses import dataclass, field
 
 
-@dataclass
+# HTTP/2 lets concurrent requests share one multiplexed connection. httpx
+# only negotiates it over TLS, so it is used for https:// API URLs when the
+# optional h2 package (httpx[http2]) is installed; otherwise HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+# Work items waiting for the sender thread; when full, the oldest is dropped
+MAX_QUEUE_SIZE = 10_000
+
+# Agent IDs the server has assigned, kept across restarts per API URL so warm
+# starts skip registration. Entries older than the TTL are re-checked.
+AGENT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "agentwatch", "registered.json")
+AGENT_CACHE_TTL_S = 3600
+
+# Longest input/output summary kept on a trace
+MAX_SUMMARY_LENGTH = 1000
+
+# Work items sent per bulk request, and how long the sender lets items pile up
+# before sending a smaller batch
+MAX_BATCH_ITEMS = 500
+BATCH_WINDOW_S = 0.1
+
+# Tells the sender thread to exit
+_STOP = object()
+
+
+# Clients not yet closed, flushed and closed when the program exits
+_open_clients: "weakref.WeakSet[AgentWatch]" = weakref.WeakSet()
+
+
+def _close_open_clients():
+    """Send what every open client still has queued, then close it."""
+    for client in list(_open_clients):
+        client.close()
+
+
+# The final flush resolves hostnames (getaddrinfo) on the sender loop's
+# default executor, which concurrent.futures shuts down in its own threading
+# exit hook, before atexit callbacks run. Threading's exit hooks run in
+# reverse registration order, so registering here, after importing
+# concurrent.futures.thread above, flushes while executors still work.
+getattr(threading, "_register_atexit", atexit.register)(_close_open_clients)
+
+
+# Lists in a bulk ingest body
+INGEST_KEYS = ("traces", "completions", "events", "costs", "compliance_events")
+
+
+def _empty_batch() -> Dict[str, list]:
+    """A bulk ingest body to fill, plus the agents and alerts sent alongside it."""
+    batch = {key: [] for key in INGEST_KEYS}
+    batch["agents"] = []
+    batch["alerts"] = []
+    return batch
+
+
+def agent_id_for(agent_name: str) -> str:
+    """The ID the SDK registers an agent under: stable for a given name."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"agentwatch:agent:{agent_name}"))
+
+
+def _trace_of(key: str, record) -> str:
+    """The ID of the trace a bulk ingest record belongs to."""
+    if key in ("traces", "completions"):
+        return record["id"]
+    if key == "events":
+        return record.trace_id
+    return record["trace_id"]
+
+
+def _rejected_records(response: httpx.Response) -> Optional[Dict[Tuple[str, int], str]]:
+    """
+    The records a bulk ingest 422 names, as (list, index) -> reason.
+    
+    None if the response does not pin every error on a record, in which
+    case nothing in the batch can be trusted to be valid.
+    """
+    try:
+        errors = response.json()["detail"]
+        rejected = {}
+        for error in errors:
+            loc = error["loc"]
+            if len(loc) < 3 or loc[0] != "body" or loc[1] not in INGEST_KEYS or not isinstance(loc[2], int):
+                return None
+            rejected.setdefault((loc[1], loc[2]), error.get("msg", "invalid"))
+        return rejected or None
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+@dataclass(slots=True)
+class EventRecord:
+    """An event logged on a span, buffered until the trace ends."""
+    trace_id: str
+    event_type: str
+    event_name: Optional[str] = None
+    input_data: Optional[Dict] = None
+    output_data: Optional[Dict] = None
+    duration_ms: Optional[int] = None
+    status: Optional[str] = None
+    model: Optional[str] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    attributes: Optional[Dict] = None
+
+
+@dataclass(slots=True)
 class SpanContext:
-    """Context for a trace span."""
+    """
+    Context for a trace span.
+    
+    The record lists start as None and are created on first use, so spans
+    that log nothing allocate none of them.
+    """
     trace_id: str
     agent_id: str
     environment: str
+    parent_trace_id: Optional[str] = None
     user_id: Optional[str] = None
     session_id: Optional[str] = None
     task_type: Optional[str] = None
     attributes: Dict[str, Any] = field(default_factory=dict)
-    events: List[Dict] = field(default_factory=list)
-    costs: List[Dict] = field(default_factory=list)
-    compliance_events: List[Dict] = field(default_factory=list)
+    events: Optional[List[EventRecord]] = None
+    costs: Optional[List[Dict]] = None
+    compliance_events: Optional[List[Dict]] = None
     status: str = "running"
     error_message: Optional[str] = None
     input_summary: Optional[str] = None
     output_summary: Optional[str] = None
+    duration_ms: Optional[int] = None
+
+
+def _iso_utc(time_ns: int) -> str:
+    """Format a time.time_ns() reading as a naive UTC ISO timestamp, as the API stores them."""
+    # Whole seconds and microseconds separately: a float of nanoseconds since
+    # the epoch is only precise to about a microsecond
+    seconds, ns = divmod(time_ns, 1_000_000_000)
+    moment = datetime.fromtimestamp(seconds, timezone.utc) + timedelta(microseconds=ns // 1000)
+    return moment.replace(tzinfo=None).isoformat()
 
 
 class Span:
@@ -38,7 +172,9 @@ class Span:
     def __init__(self, context: SpanContext, client: "AgentWatch"):
         self._context = context
         self._client = client
-        self._start_time = datetime.utcnow()
+        # Raw clock readings; only formatted on the sender thread
+        self._start_time_ns = time.time_ns()
+        self._start_ns = time.monotonic_ns()
     
     @property
     def trace_id(self) -> str:
@@ -55,12 +191,19 @@ class Span:
             self._context.error_message = error_message
     
     def set_input(self, summary: str):
-        """Set input summary (truncated/redacted)."""
-        self._context.input_summary = summary[:1000]  # Truncate
+        """Set input summary. Pass already truncated/redacted text; anything past MAX_SUMMARY_LENGTH is cut."""
+        self._context.input_summary = summary if len(summary) <= MAX_SUMMARY_LENGTH else summary[:MAX_SUMMARY_LENGTH]
     
     def set_output(self, summary: str):
-        """Set output summary (truncated/redacted)."""
-        self._context.output_summary = summary[:1000]  # Truncate
+        """Set output summary. Pass already truncated/redacted text; anything past MAX_SUMMARY_LENGTH is cut."""
+        self._context.output_summary = summary if len(summary) <= MAX_SUMMARY_LENGTH else summary[:MAX_SUMMARY_LENGTH]
+    
+    def _add_event(self, event: EventRecord):
+        """Buffer an event, creating the list on first use."""
+        if self._context.events is None:
+            self._context.events = [event]
+        else:
+            self._context.events.append(event)
     
     def log_event(
         self,
@@ -73,15 +216,16 @@ class Span:
         **kwargs
     ):
         """Log a generic event."""
-        self._context.events.append({
-            "event_type": event_type,
-            "event_name": event_name,
-            "input_data": input_data,
-            "output_data": output_data,
-            "duration_ms": duration_ms,
-            "status": status,
-            "attributes": kwargs
-        })
+        self._add_event(EventRecord(
+            trace_id=self._context.trace_id,
+            event_type=event_type,
+            event_name=event_name,
+            input_data=input_data,
+            output_data=output_data,
+            duration_ms=duration_ms,
+            status=status,
+            attributes=kwargs or None  # null rather than {} when no extras
+        ))
     
     def log_llm_call(
         self,
@@ -93,16 +237,17 @@ class Span:
         **kwargs
     ):
         """Log an LLM API call."""
-        self._context.events.append({
-            "event_type": "llm_call",
-            "event_name": f"LLM: {model}",
-            "model": model,
-            "input_tokens": input_tokens,
-            "output_tokens": output_tokens,
-            "duration_ms": duration_ms,
-            "status": status,
-            "attributes": kwargs
-        })
+        self._add_event(EventRecord(
+            trace_id=self._context.trace_id,
+            event_type="llm_call",
+            event_name=f"LLM: {model}",
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            duration_ms=duration_ms,
+            status=status,
+            attributes=kwargs or None  # null rather than {} when no extras
+        ))
     
     def log_tool_call(
         self,
@@ -113,14 +258,15 @@ class Span:
         status: str = "success"
     ):
         """Log a tool invocation."""
-        self._context.events.append({
-            "event_type": "tool_call",
-            "event_name": f"Tool: {tool_name}",
-            "input_data": input_data,
-            "output_data": output_data,
-            "duration_ms": duration_ms,
-            "status": status
-        })
+        self._add_event(EventRecord(
+            trace_id=self._context.trace_id,
+            event_type="tool_call",
+            event_name=f"Tool: {tool_name}",
+            input_data=input_data,
+            output_data=output_data,
+            duration_ms=duration_ms,
+            status=status
+        ))
     
     def log_cost(
         self,
@@ -130,12 +276,17 @@ class Span:
         **kwargs
     ):
         """Log a cost entry."""
-        self._context.costs.append({
+        cost = {
+            "trace_id": self._context.trace_id,
             "amount": amount,
             "category": category,
             "currency": currency,
             **kwargs
-        })
+        }
+        if self._context.costs is None:
+            self._context.costs = [cost]
+        else:
+            self._context.costs.append(cost)
     
     def log_compliance_event(
         self,
@@ -148,7 +299,8 @@ class Span:
         **kwargs
     ):
         """Log a compliance-relevant event for audit trail."""
-        self._context.compliance_events.append({
+        compliance_event = {
+            "trace_id": self._context.trace_id,
             "event_type": event_type,
             "action": action,
             "resource": resource,
@@ -156,7 +308,121 @@ class Span:
             "data_classification": data_classification,
             "outcome": outcome,
             **kwargs
+        }
+        if self._context.compliance_events is None:
+            self._context.compliance_events = [compliance_event]
+        else:
+            self._context.compliance_events.append(compliance_event)
+
+
+# The innermost active span in the current thread or task
+_active_span: ContextVar[Optional[Span]] = ContextVar("agentwatch_active_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The span of the innermost trace being run, if any."""
+    return _active_span.get()
+
+
+class _TraceContext(ContextDecorator):
+    """What AgentWatch.trace() returns: starts a span on entry, ends it on exit."""
+    
+    def __init__(
+        self,
+        watch: "AgentWatch",
+        agent_name: str,
+        user_id: Optional[str],
+        session_id: Optional[str],
+        task_type: Optional[str],
+        attributes: Dict[str, Any]
+    ):
+        self._watch = watch
+        self._agent_name = agent_name
+        self._user_id = user_id
+        self._session_id = session_id
+        self._task_type = task_type
+        self._attributes = attributes
+        self._span: Optional[Span] = None
+        self._token = None
+    
+    def _recreate_cm(self):
+        # Each decorated call gets its own span
+        return _TraceContext(
+            self._watch, self._agent_name, self._user_id, self._session_id,
+            self._task_type, dict(self._attributes)
+        )
+    
+    def __call__(self, func):
+        # ContextDecorator would end the trace as soon as calling an async
+        # function returned its coroutine or generator; trace the run instead
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def traced(*args, **kwargs):
+                with self._recreate_cm():
+                    return await func(*args, **kwargs)
+            return traced
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def traced_gen(*args, **kwargs):
+                with self._recreate_cm():
+                    async for item in func(*args, **kwargs):
+                        yield item
+            return traced_gen
+        return super().__call__(func)
+    
+    def __enter__(self) -> Span:
+        watch = self._watch
+        agent_id = watch._ensure_agent(self._agent_name)
+        trace_id = os.urandom(16).hex()
+        parent = _active_span.get()
+        parent_trace_id = parent.trace_id if parent else None
+        
+        context = SpanContext(
+            trace_id=trace_id,
+            agent_id=agent_id,
+            environment=watch.environment,
+            parent_trace_id=parent_trace_id,
+            user_id=self._user_id,
+            session_id=self._session_id,
+            task_type=self._task_type,
+            attributes=self._attributes
+        )
+        
+        self._span = span = Span(context, watch)
+        self._token = _active_span.set(span)
+        
+        # Start trace
+        watch._submit("trace_start", {
+            "id": trace_id,
+            "started_at": span._start_time_ns,
+            "agent_id": agent_id,
+            "parent_trace_id": parent_trace_id,
+            "environment": watch.environment,
+            "user_id": self._user_id,
+            "session_id": self._session_id,
+            "task_type": self._task_type,
+            "attributes": self._attributes
         })
+        return span
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        span = self._span
+        context = span._context
+        _active_span.reset(self._token)
+        
+        if exc_type is None:
+            # Default to success if not set
+            if context.status == "running":
+                context.status = "success"
+        elif issubclass(exc_type, Exception):
+            context.status = "error"
+            context.error_message = str(exc)
+        
+        # End trace. Timed here rather than by the server, which only sees
+        # the trace when the sender gets to it
+        context.duration_ms = (time.monotonic_ns() - span._start_ns) // 1_000_000
+        self._watch._submit("trace_end", span)
+        return False
 
 
 class AgentWatch:
@@ -183,23 +449,150 @@ class AgentWatch:
         
         Args:
             api_key: API key for authentication (or AGENTWATCH_API_KEY env var)
-            api_url: AgentWatch API URL
+            api_url: AgentWatch API URL, or unix:///path/to.sock for a
+                colocated API server listening on a Unix socket
             environment: Environment name (production, staging, development)
             auto_register_agents: Automatically register new agents
         """
         self.api_key = api_key or os.getenv("AGENTWATCH_API_KEY", "demo-key")
         self.api_url = api_url.rstrip("/")
+        # A Unix socket skips the loopback TCP stack for a server on the
+        # same host; requests then carry a placeholder host
+        socket_path = self.api_url[len("unix://"):] if self.api_url.startswith("unix://") else None
+        base_url = "http://localhost" if socket_path else self.api_url
+        # Endpoint URLs are built and parsed once, not on every request
+        self._agents_url = httpx.URL(f"{base_url}/api/agents")
+        self._ingest_url = httpx.URL(f"{base_url}/api/ingest")
+        self._alerts_url = httpx.URL(f"{base_url}/api/alerts")
+        self._trace_prefix = f"{base_url}/api/traces/"
         self.environment = environment
         self.auto_register_agents = auto_register_agents
-        self._registered_agents: set = set()
-        self._client = httpx.Client(timeout=30.0)
-    
-    def _headers(self) -> Dict[str, str]:
-        """Get request headers."""
-        return {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
+        # Agent name -> (ID, when it was last registered). Guarded by the
+        # lock, since traces on any thread look agents up
+        self._agent_lock = threading.Lock()
+        self._agent_cache: Dict[str, Tuple[str, float]] = self._load_agent_cache()
+        # One pooled client per instance. Idle connections are kept for a
+        # minute so traces spaced out by agent work reuse them, and failed
+        # connection attempts are retried once
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            transport=httpx.AsyncHTTPTransport(
+                http2=HTTP2_AVAILABLE and self.api_url.startswith("https://"),
+                uds=socket_path,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=60.0),
+                retries=1
+            )
+        )
+        
+        # All HTTP I/O happens on a background sender thread running an event
+        # loop, so traced code only pays for handing over a work item, never
+        # for a network round trip, and a trace's requests can run concurrently
+        # Work items discarded because the queue was full. Approximate: the
+        # length check and the append in _push are separate steps, so under
+        # concurrent producers an eviction can go uncounted or be counted twice
+        self.dropped = 0
+        self._closed = False
+        # Work items are handed over through a bounded deque: append() and
+        # popleft() are atomic, so producers on any thread take no lock, and
+        # a full deque discards its oldest item by itself. The sender loop is
+        # only woken (call_soon_threadsafe, a pipe write) when it is idle.
+        self._pending: collections.deque = collections.deque(maxlen=MAX_QUEUE_SIZE)
+        self._idle = False
+        # Created on the sender thread's loop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        ready = threading.Event()
+        self._worker = threading.Thread(
+            target=asyncio.run,
+            args=(self._drain_loop(ready),),
+            name="agentwatch-sender",
+            daemon=True
+        )
+        self._worker.start()
+        ready.wait()
+        # Send whatever is still queued when the process exits
+        _open_clients.add(self)
+    
+    def _submit(self, kind: str, payload: Any):
+        """Queue a work item for the sender thread without blocking."""
+        if not self._closed:
+            self._push((kind, payload))
+    
+    def _push(self, item):
+        """Append a work item and wake the sender if it is waiting."""
+        if len(self._pending) == MAX_QUEUE_SIZE:
+            self.dropped += 1
+        self._pending.append(item)
+        if self._idle:
+            self._idle = False
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    async def _send_json(self, method: str, url, body: Any) -> httpx.Response:
+        """
+        Send a JSON body encoded by orjson.
+        
+        orjson writes compact JSON (no spaces after separators), so bodies
+        are smaller than httpx's json= encoding, and it encodes the buffered
+        event records natively. The client already sets the content type.
+        """
+        return await self._client.request(method, url, content=orjson.dumps(body))
+    
+    def _run(self, coro):
+        """Run a coroutine on the sender loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+    
+    async def _drain_loop(self, ready: threading.Event):
+        """Sender thread: send queued work items in order until stopped."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._drained = asyncio.Event()
+        ready.set()
+        try:
+            while True:
+                # Let short traces pile up for a moment, so many of them
+                # share one request
+                if len(self._pending) < MAX_BATCH_ITEMS and not self._closed:
+                    await asyncio.sleep(BATCH_WINDOW_S)
+                
+                batch = _empty_batch()
+                stop = False
+                for _ in range(min(len(self._pending), MAX_BATCH_ITEMS)):
+                    item = self._pending.popleft()
+                    if item is _STOP:
+                        stop = True
+                        break
+                    self._add_to_batch(batch, *item)
+                await self._send_batch(batch)
+                if stop:
+                    return
+                if self._pending:
+                    continue
+                self._drained.set()
+                
+                # Mark idle before the final check, so an item pushed after
+                # it sees the flag and wakes us
+                self._wakeup.clear()
+                self._idle = True
+                if self._pending:
+                    self._idle = False
+                    continue
+                await self._wakeup.wait()
+        finally:
+            self._drained.set()
+            await self._client.aclose()
+    
+    async def _wait_drained(self):
+        """Wait until every pushed work item has been sent."""
+        while True:
+            self._drained.clear()
+            if not self._pending and self._idle:
+                return
+            await self._drained.wait()
     
     def register_agent(
         self,
@@ -211,39 +604,86 @@ class AgentWatch:
         config: Optional[Dict] = None
     ) -> str:
         """Register an agent with AgentWatch."""
+        if self._closed:
+            return agent_id
+        return self._run(self._register_agent({
+            "id": agent_id,
+            "name": name,
+            "description": description,
+            "agent_type": agent_type,
+            "owner": owner,
+            "config": config
+        })) or agent_id
+    
+    async def _register_agent(self, agent: Dict) -> Optional[str]:
+        """Create an agent on the server, returning its ID (None on failure)."""
         try:
-            response = self._client.post(
-                f"{self.api_url}/api/agents",
-                headers=self._headers(),
-                json={
-                    "name": name,
-                    "description": description,
-                    "agent_type": agent_type,
-                    "owner": owner,
-                    "config": config
-                }
-            )
+            response = await self._send_json("POST", self._agents_url, agent)
             if response.status_code == 200:
-                data = response.json()
-                self._registered_agents.add(data["id"])
-                return data["id"]
+                agent_id = response.json()["id"]
+                with self._agent_lock:
+                    self._agent_cache[agent["name"]] = (agent_id, time.time())
+                return agent_id
+            print(f"Warning: Failed to register agent: HTTP {response.status_code}")
         except Exception as e:
             print(f"Warning: Failed to register agent: {e}")
         
-        return agent_id
+        # Forget it, so the next trace tries again
+        with self._agent_lock:
+            if self._agent_cache.get(agent["name"], (None,))[0] == agent.get("id"):
+                del self._agent_cache[agent["name"]]
+        return None
     
     def _ensure_agent(self, agent_name: str) -> str:
-        """Ensure agent is registered, return agent_id."""
-        # Simple: use name as ID for now
-        agent_id = agent_name.lower().replace(" ", "-")
+        """
+        Ensure agent is registered, return agent_id.
+        
+        Agent IDs are derived from the name and registering an existing ID
+        is a no-op, so a trace can use the ID straight away: registration is
+        queued for the sender thread, ahead of the trace start. Registrations
+        older than AGENT_CACHE_TTL_S are re-sent, in case the server lost the
+        agent.
+        """
+        if not self.auto_register_agents:
+            return agent_id_for(agent_name)
         
-        if agent_id not in self._registered_agents and self.auto_register_agents:
-            self.register_agent(agent_id, agent_name)
-            self._registered_agents.add(agent_id)
+        with self._agent_lock:
+            cached = self._agent_cache.get(agent_name)
+            if cached and time.time() - cached[1] < AGENT_CACHE_TTL_S:
+                return cached[0]
+            agent_id = cached[0] if cached else agent_id_for(agent_name)
+            # Recorded before it is sent, so other threads don't queue it again
+            self._agent_cache[agent_name] = (agent_id, time.time())
         
+        self._submit("register_agent", {"id": agent_id, "name": agent_name})
         return agent_id
     
-    @contextmanager
+    def _load_agent_cache(self) -> Dict[str, Tuple[str, float]]:
+        """Read this API URL's cached agent IDs from disk."""
+        try:
+            with open(AGENT_CACHE_PATH, "rb") as f:
+                entries = orjson.loads(f.read()).get(self.api_url, {})
+            return {name: (agent_id, confirmed_at) for name, (agent_id, confirmed_at) in entries.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            return {}
+    
+    def _save_agent_cache(self):
+        """Write this API URL's agent IDs to disk, keeping other URLs' entries."""
+        try:
+            try:
+                with open(AGENT_CACHE_PATH, "rb") as f:
+                    cache = orjson.loads(f.read())
+            except (OSError, ValueError):
+                cache = {}
+            if not isinstance(cache, dict):
+                cache = {}
+            cache[self.api_url] = self._agent_cache
+            os.makedirs(os.path.dirname(AGENT_CACHE_PATH), exist_ok=True)
+            with open(AGENT_CACHE_PATH, "wb") as f:
+                f.write(orjson.dumps(cache))
+        except OSError as e:
+            print(f"Warning: Failed to save agent cache: {e}")
+    
     def trace(
         self,
         agent_name: str,
@@ -251,106 +691,112 @@ class AgentWatch:
         session_id: Optional[str] = None,
         task_type: Optional[str] = None,
         **attributes
-    ):
+    ) -> "_TraceContext":
         """
         Create a trace context for an agent execution.
         
+        A trace started inside another becomes its child. Also works as a
+        decorator, tracing each call.
+        
         Usage:
             with watch.trace("my-agent", user_id="123") as span:
                 result = agent.run()
                 span.set_status("success")
+            
+            @watch.trace("my-agent")
+            def handle(task): ...  # or async def, including async generators
         """
-        agent_id = self._ensure_agent(agent_name)
-        trace_id = str(uuid.uuid4())
-        
-        context = SpanContext(
-            trace_id=trace_id,
-            agent_id=agent_id,
-            environment=self.environment,
-            user_id=user_id,
-            session_id=session_id,
-            task_type=task_type,
-            attributes=attributes
-        )
+        return _TraceContext(self, agent_name, user_id, session_id, task_type, attributes)
+    
+    def _add_to_batch(self, batch: Dict[str, list], kind: str, payload: Any):
+        """Add a work item to the batch being built."""
+        if kind == "trace_start":
+            payload["started_at"] = _iso_utc(payload["started_at"])
+            batch["traces"].append(payload)
+        elif kind == "trace_end":
+            ctx = payload._context
+            batch["completions"].append({
+                "id": ctx.trace_id,
+                "status": ctx.status,
+                "error_message": ctx.error_message,
+                "output_summary": ctx.output_summary,
+                "attributes": ctx.attributes,
+                "duration_ms": ctx.duration_ms
+            })
+            # Records already carry their trace ID
+            if ctx.events:
+                batch["events"].extend(ctx.events)
+            if ctx.costs:
+                batch["costs"].extend(ctx.costs)
+            if ctx.compliance_events:
+                batch["compliance_events"].extend(ctx.compliance_events)
+        elif kind == "register_agent":
+            batch["agents"].append(payload)
+        elif kind == "alert":
+            batch["alerts"].append(payload)
+    
+    async def _send_batch(self, batch: Dict[str, list]):
+        """
+        Send a batch: every trace start, completion and record in one bulk
+        ingest request, with alerts (which it does not carry) alongside.
+        Agents are registered first, since the batch's traces refer to them.
+        """
+        agents = batch.pop("agents")
+        if agents:
+            await asyncio.gather(*[self._register_agent(agent) for agent in agents])
+        alerts = batch.pop("alerts")
+        requests = [self._send_json("POST", self._alerts_url, alert) for alert in alerts]
+        if any(batch.values()):
+            requests.append(self._send_ingest(batch))
+        for result in await asyncio.gather(*requests, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"Warning: Failed to send telemetry: {result}")
+            elif result is not None and result.status_code >= 400:
+                print(f"Warning: Failed to send telemetry: HTTP {result.status_code}")
+    
+    async def _send_ingest(self, batch: Dict[str, list]):
+        """
+        Send a batch to the bulk ingest endpoint, logging everything the
+        server did not store.
         
-        span = Span(context, self)
+        One invalid record makes the server reject the whole request with a
+        422 naming it, so the batch is resent once without the records named:
+        each only costs itself, not its trace or the rest of the batch.
+        """
+        response = await self._send_json("POST", self._ingest_url, batch)
+        if response.status_code == 422:
+            rejected = _rejected_records(response)
+            if rejected is None:
+                print(f"Warning: Failed to send telemetry: HTTP 422 {response.text}")
+                return
+            for (key, index), reason in rejected.items():
+                print(f"Warning: Dropped invalid {key} record of trace {_trace_of(key, batch[key][index])}: {reason}")
+            batch = {
+                key: [record for index, record in enumerate(records) if (key, index) not in rejected]
+                for key, records in batch.items()
+            }
+            if not any(batch.values()):
+                return
+            response = await self._send_json("POST", self._ingest_url, batch)
         
-        # Start trace
-        try:
-            self._client.post(
-                f"{self.api_url}/api/traces",
-                headers=self._headers(),
-                json={
-                    "agent_id": agent_id,
-                    "environment": self.environment,
-                    "user_id": user_id,
-                    "session_id": session_id,
-                    "task_type": task_type,
-                    "attributes": attributes
-                }
-            )
-        except Exception as e:
-            print(f"Warning: Failed to start trace: {e}")
+        if response.status_code >= 400:
+            print(f"Warning: Failed to send telemetry: HTTP {response.status_code}")
+            return
+        result = response.json()
+        for error in result.get("errors") or []:
+            print(f"Warning: Telemetry not stored: {error}")
         
-        try:
-            yield span
-            # Default to success if not set
-            if context.status == "running":
-                context.status = "success"
-        except Exception as e:
-            context.status = "error"
-            context.error_message = str(e)
-            raise
-        finally:
-            # End trace
-            self._end_trace(span)
-    
-    def _end_trace(self, span: Span):
-        """Send trace completion and all events."""
-        ctx = span._context
-        
-        try:
-            # Update trace status
-            self._client.patch(
-                f"{self.api_url}/api/traces/{ctx.trace_id}",
-                headers=self._headers(),
-                json={
-                    "status": ctx.status,
-                    "error_message": ctx.error_message,
-                    "output_summary": ctx.output_summary,
-                    "attributes": ctx.attributes
-                }
-            )
-            
-            # Send events
-            for event in ctx.events:
-                event["trace_id"] = ctx.trace_id
-                self._client.post(
-                    f"{self.api_url}/api/events",
-                    headers=self._headers(),
-                    json=event
-                )
-            
-            # Send costs
-            for cost in ctx.costs:
-                cost["trace_id"] = ctx.trace_id
-                self._client.post(
-                    f"{self.api_url}/api/costs",
-                    headers=self._headers(),
-                    json=cost
-                )
-            
-            # Send compliance events
-            for ce in ctx.compliance_events:
-                ce["trace_id"] = ctx.trace_id
-                self._client.post(
-                    f"{self.api_url}/api/compliance",
-                    headers=self._headers(),
-                    json=ce
-                )
-                
-        except Exception as e:
-            print(f"Warning: Failed to end trace: {e}")
+        # Servers predating bulk completions ignore them; complete each trace
+        if batch["completions"] and "traces_completed" not in result:
+            responses = await asyncio.gather(*[
+                self._send_json("PATCH", self._trace_prefix + completion["id"], completion)
+                for completion in batch["completions"]
+            ], return_exceptions=True)
+            for completion, patched in zip(batch["completions"], responses):
+                if isinstance(patched, Exception):
+                    print(f"Warning: Failed to complete trace {completion['id']}: {patched}")
+                elif patched.status_code >= 400:
+                    print(f"Warning: Failed to complete trace {completion['id']}: HTTP {patched.status_code}")
     
     def create_alert(
         self,
@@ -362,25 +808,30 @@ class AgentWatch:
         details: Optional[Dict] = None
     ):
         """Create a custom alert."""
-        try:
-            self._client.post(
-                f"{self.api_url}/api/alerts",
-                headers=self._headers(),
-                json={
-                    "title": title,
-                    "severity": severity,
-                    "alert_type": alert_type,
-                    "description": description,
-                    "agent_id": agent_id,
-                    "details": details
-                }
-            )
-        except Exception as e:
-            print(f"Warning: Failed to create alert: {e}")
+        self._submit("alert", {
+            "title": title,
+            "severity": severity,
+            "alert_type": alert_type,
+            "description": description,
+            "agent_id": agent_id,
+            "details": details
+        })
+    
+    def flush(self):
+        """Block until everything queued so far has been sent."""
+        if not self._closed:
+            self._run(self._wait_drained())
     
     def close(self):
-        """Close the client."""
-        self._client.close()
+        """Send any queued telemetry, then close the client."""
+        if self._closed:
+            return
+        self._closed = True
+        _open_clients.discard(self)
+        self._push(_STOP)
+        self._worker.join()
+        if self._agent_cache:
+            self._save_agent_cache()
     
     def __enter__(self):
         return self
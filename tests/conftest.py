@@ -0,0 +1,35 @@
+"""
+Shared fixtures.
+
+The API runs against a throwaway SQLite file, selected before anything
+imports src.api.database (which reads DATABASE_URL at import time).
+"""
+
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/agentwatch-test.db"
+
+import httpx
+import pytest_asyncio
+
+from src.api.database import init_db, engine
+from src.api.main import app
+
+
+@pytest_asyncio.fixture
+async def client():
+    """An HTTP client talking to the API in-process."""
+    await init_db()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def agent_id(client):
+    """A freshly registered agent."""
+    response = await client.post("/api/agents", json={"name": "test-agent"})
+    assert response.status_code == 200
+    return response.json()["id"]
@@ -0,0 +1,52 @@
+"""Tests for alerts and the streamed alert list."""
+
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import lambda_stmt, select, text
+
+from src.api import main
+from src.api.database import async_session_factory
+from src.api.main import app, STREAM_BATCH_SIZE
+from src.api.models import Alert
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_alerts_stream_across_batches(client):
+    count = STREAM_BATCH_SIZE + 5
+    for i in range(count):
+        response = await client.post("/api/alerts", json={
+            "alert_type": "cost_spike", "severity": "info", "title": f"alert {i}"
+        })
+        assert response.status_code == 200
+
+    response = await client.get("/api/alerts", params={"limit": count + 10})
+    assert response.status_code == 200
+    assert len({alert["id"] for alert in response.json()}) == count
+
+
+async def test_failing_list_query_is_a_server_error(client, monkeypatch):
+    monkeypatch.setattr(main, "_LIST_ALERTS", lambda_stmt(lambda: select(text("* FROM missing_table"))))
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as errors_client:
+        response = await errors_client.get("/api/alerts")
+    assert response.status_code == 500
+
+
+async def test_alert_trace_id_matches_its_trace(client, agent_id):
+    trace = (await client.post("/api/traces", json={"agent_id": agent_id})).json()
+    response = await client.post("/api/alerts", json={
+        "alert_type": "error_spike", "severity": "error", "title": "failed",
+        "trace_id": str(uuid.UUID(trace["id"]))
+    })
+    assert response.status_code == 200
+    async with async_session_factory() as session:
+        alert = await session.get(Alert, response.json()["id"])
+    assert alert.trace_id == trace["id"]
+
+    response = await client.post("/api/alerts", json={
+        "alert_type": "error_spike", "severity": "error", "title": "failed", "trace_id": "not-a-trace"
+    })
+    assert response.status_code == 422
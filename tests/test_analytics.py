@@ -0,0 +1,22 @@
+"""Tests for the analytics endpoints."""
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_unchanged_analytics_revalidate_with_etag(client):
+    response = await client.get("/api/analytics/summary")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await client.get("/api/analytics/summary", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+async def test_other_routes_are_not_tagged(client):
+    response = await client.post("/api/ingest", json={})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
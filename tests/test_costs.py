@@ -0,0 +1,26 @@
+"""Tests for the cost endpoints."""
+
+import pytest
+
+from src.sdk.client import Span, SpanContext
+
+pytestmark = pytest.mark.asyncio
+
+
+def sdk_cost(trace_id: str, **kwargs) -> dict:
+    """The cost record the SDK sends for span.log_cost()."""
+    span = Span(SpanContext(trace_id=trace_id, agent_id="agent", environment="test"), client=None)
+    span.log_cost(1.5, **kwargs)
+    return {**span._context.costs[0], "trace_id": trace_id}
+
+
+async def test_sdk_default_cost_is_accepted(client, agent_id):
+    trace = (await client.post("/api/traces", json={"agent_id": agent_id})).json()
+
+    response = await client.post("/api/costs", json=sdk_cost(trace["id"]))
+    assert response.status_code == 200
+    assert response.json()["category"] == "other"
+
+    response = await client.post("/api/ingest", json={"costs": [sdk_cost(trace["id"])]})
+    assert response.status_code == 200
+    assert response.json()["costs_created"] == 1
@@ -0,0 +1,17 @@
+"""Tests for the event endpoints."""
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_created_event_matches_listed_event(client, agent_id):
+    trace = (await client.post("/api/traces", json={"agent_id": agent_id})).json()
+    response = await client.post("/api/events", json={
+        "trace_id": trace["id"], "event_type": "llm_call", "model": "gpt-4", "input_tokens": 10, "output_tokens": 20
+    })
+    assert response.status_code == 200
+    created = response.json()
+
+    listed = (await client.get("/api/events", params={"trace_id": trace["id"]})).json()
+    assert [(e["id"], e["trace_id"]) for e in listed] == [(created["id"], created["trace_id"])]
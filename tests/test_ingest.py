@@ -0,0 +1,48 @@
+"""Tests for trace creation and bulk ingest."""
+
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_client_trace_id_is_normalised(client, agent_id):
+    trace_id = uuid.uuid4()
+    response = await client.post("/api/traces", json={"id": str(trace_id), "agent_id": agent_id})
+    assert response.status_code == 200
+
+    response = await client.get(f"/api/traces/{trace_id.hex}")
+    assert response.status_code == 200
+    assert uuid.UUID(response.json()["id"]) == trace_id
+
+
+@pytest.mark.parametrize("field", ["id", "parent_trace_id"])
+async def test_malformed_trace_id_is_rejected(client, agent_id, field):
+    response = await client.post("/api/traces", json={field: "not-a-uuid", "agent_id": agent_id})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("key, record", [
+    ("events", {"event_type": "custom"}),
+    ("costs", {"amount": 1.0, "category": "llm"}),
+    ("compliance_events", {"event_type": "data_access", "action": "read"}),
+])
+async def test_malformed_record_trace_id_is_rejected(client, key, record):
+    response = await client.post("/api/ingest", json={key: [{**record, "trace_id": "not-a-uuid"}]})
+    assert response.status_code == 422
+
+
+async def test_completion_finishes_a_trace_started_in_the_same_batch(client, agent_id):
+    trace_id, unknown_id = uuid.uuid4().hex, uuid.uuid4().hex
+    response = await client.post("/api/ingest", json={
+        "traces": [{"id": trace_id, "agent_id": agent_id}],
+        "completions": [{"id": trace_id, "status": "success"}, {"id": unknown_id, "status": "success"}]
+    })
+    assert response.status_code == 200
+    assert response.json()["traces_completed"] == 1
+    assert response.json()["errors"] == [f"traces {unknown_id}: not found"]
+
+    trace = (await client.get(f"/api/traces/{trace_id}")).json()
+    assert trace["status"] == "success"
+    assert trace["duration_ms"] is not None
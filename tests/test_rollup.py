@@ -0,0 +1,78 @@
+"""Tests for the metrics rollup and late writes behind its watermark."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.api.database import async_session_factory
+from src.api.rollup import rollup_once, floor_bucket, TRACE_BUCKET
+
+pytestmark = pytest.mark.asyncio
+
+
+async def run_rollup():
+    """A rollup pass late enough to pick up every flag written so far."""
+    async with async_session_factory.begin() as session:
+        await rollup_once(session, datetime.utcnow() + timedelta(minutes=1))
+
+
+async def summary(client, agent_id: str, since: datetime) -> dict:
+    response = await client.get(
+        "/api/analytics/summary", params={"agent_id": agent_id, "since": since.isoformat()}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def ingest(client, **body) -> dict:
+    response = await client.post("/api/ingest", json=body)
+    assert response.status_code == 200
+    assert response.json()["errors"] == []
+    return response.json()
+
+
+async def start_trace(client, agent_id: str, started_at: datetime) -> str:
+    trace_id = uuid.uuid4().hex
+    await ingest(client, traces=[{"id": trace_id, "agent_id": agent_id, "started_at": started_at.isoformat()}])
+    return trace_id
+
+
+async def test_late_completion_is_rolled_up_again(client, agent_id):
+    old_bucket = floor_bucket(datetime.utcnow() - timedelta(days=2), TRACE_BUCKET)
+    since = old_bucket - timedelta(hours=1)
+    await start_trace(client, agent_id, old_bucket + timedelta(minutes=5))
+    running_id = await start_trace(client, agent_id, old_bucket + timedelta(minutes=6))
+    await run_rollup()
+    assert (await summary(client, agent_id, since))["total_traces"] == 2
+
+    # A completion for a trace that was still running when its bucket was rolled up
+    response = await client.patch(f"/api/traces/{running_id}", json={"status": "success"})
+    assert response.status_code == 200
+
+    await run_rollup()
+    result = await summary(client, agent_id, since)
+    assert result["total_traces"] == 2
+    assert result["success_count"] == 1
+
+
+async def test_late_trace_is_rolled_up_again(client, agent_id):
+    old_bucket = floor_bucket(datetime.utcnow() - timedelta(days=3), TRACE_BUCKET)
+    since = old_bucket - timedelta(hours=1)
+    running_id = await start_trace(client, agent_id, old_bucket + timedelta(minutes=5))
+    await run_rollup()
+    assert (await summary(client, agent_id, since))["total_traces"] == 1
+
+    # A trace that reaches the server after its bucket was rolled up, stamped
+    # with a UTC offset, and a bulk completion for the trace still running
+    started_at = (old_bucket + timedelta(minutes=7)).replace(tzinfo=timezone.utc)
+    await ingest(
+        client,
+        traces=[{"agent_id": agent_id, "started_at": started_at.astimezone(timezone(timedelta(hours=2))).isoformat()}],
+        completions=[{"id": running_id, "status": "success", "duration_ms": 10}]
+    )
+
+    await run_rollup()
+    result = await summary(client, agent_id, since)
+    assert result["total_traces"] == 2
+    assert result["success_count"] == 1
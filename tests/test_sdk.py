@@ -0,0 +1,181 @@
+"""Tests for the SDK client, against a local server that records what it is sent."""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import uuid
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from src.sdk.client import Span, SpanContext, current_span, _iso_utc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """Accepts every POST, answering the way the API would on success."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.received.append((self.path, body))
+        if self.path == "/api/ingest":
+            reply = {"traces_completed": len(body.get("completions") or []), "errors": []}
+        else:
+            reply = {"id": body.get("id") or uuid.uuid4().hex}
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("localhost", 0), RecordingHandler)
+    server.received = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run_script(source: str, api_url: str, home: str) -> subprocess.CompletedProcess:
+    """Run an SDK script in a fresh interpreter."""
+    return subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(source), api_url],
+        cwd=ROOT_DIR,
+        env={**os.environ, "HOME": home},
+        capture_output=True,
+        text=True,
+        timeout=30
+    )
+
+
+def test_queued_telemetry_is_sent_at_exit_without_close(server, tmp_path):
+    # localhost, not 127.0.0.1: the final flush has to resolve the hostname
+    api_url = f"http://localhost:{server.server_address[1]}"
+    result = run_script("""
+        import sys
+        from src.sdk import AgentWatch
+
+        watch = AgentWatch(api_url=sys.argv[1])
+        with watch.trace("exit-agent") as span:
+            span.set_output("done")
+    """, api_url, str(tmp_path))
+
+    assert result.returncode == 0, result.stderr
+    assert "Warning" not in result.stdout
+    ingested = [body for path, body in server.received if path == "/api/ingest"]
+    assert [len(body["completions"]) for body in ingested] == [1]
+
+
+@pytest.fixture
+def watch(tmp_path, monkeypatch):
+    """A client sending to the API in-process, on its own sender loop."""
+    from src.api.database import init_db, engine
+    from src.api.main import app
+    from src.sdk import client as sdk_client
+
+    monkeypatch.setattr(sdk_client, "AGENT_CACHE_PATH", str(tmp_path / "registered.json"))
+
+    async def create_tables():
+        await init_db()
+        await engine.dispose()
+
+    asyncio.run(create_tables())
+    watch = sdk_client.AgentWatch(api_url="http://test")
+    watch._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), headers=watch._client.headers)
+    yield watch
+    # Pooled connections belong to the sender loop
+    watch._run(engine.dispose())
+    watch.close()
+
+
+def api_get(watch, path: str, **params):
+    return watch._run(watch._client.get(f"http://test{path}", params=params))
+
+
+def test_invalid_record_only_costs_itself(watch, capsys):
+    with watch.trace("partial-agent") as span:
+        span.log_llm_call(model="gpt-4", input_tokens=10, output_tokens=20)
+        span.log_cost(1.5)
+        span.log_compliance_event("data_access", "read", data_classification="secret")
+    watch.flush()
+
+    assert api_get(watch, f"/api/traces/{span.trace_id}").json()["status"] == "success"
+    assert len(api_get(watch, "/api/events", trace_id=span.trace_id).json()) == 1
+    output = capsys.readouterr().out
+    assert f"Dropped invalid compliance_events record of trace {span.trace_id}" in output
+
+
+def test_records_the_server_does_not_store_are_logged(watch, capsys):
+    # Completed without ever being started
+    span = Span(SpanContext(trace_id=os.urandom(16).hex(), agent_id="agent", environment="test"), watch)
+    span.set_status("success")
+    span._context.duration_ms = 5
+    watch._submit("trace_end", span)
+    watch.flush()
+
+    assert f"Telemetry not stored: traces {span.trace_id}: not found" in capsys.readouterr().out
+
+
+def test_decorated_coroutine_is_traced_until_it_finishes(watch):
+    started = []
+
+    @watch.trace("async-agent")
+    async def handle():
+        parent = current_span()
+        with watch.trace("async-tool") as child:
+            started.append((parent.trace_id, child.trace_id))
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        asyncio.run(handle())
+    watch.flush()
+
+    parent_id, child_id = started[0]
+    parent = api_get(watch, f"/api/traces/{parent_id}").json()
+    assert parent["status"] == "error"
+    assert parent["error_message"] == "boom"
+    assert parent["duration_ms"] >= 50
+    child = api_get(watch, f"/api/traces/{child_id}").json()
+    assert uuid.UUID(child["parent_trace_id"]) == uuid.UUID(parent_id)
+
+
+def test_decorated_async_generator_is_traced_until_exhausted(watch):
+    spans = []
+
+    @watch.trace("streaming-agent")
+    async def stream():
+        spans.append(current_span())
+        for item in range(3):
+            await asyncio.sleep(0.02)
+            yield item
+
+    async def consume():
+        return [item async for item in stream()]
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    watch.flush()
+
+    trace = api_get(watch, f"/api/traces/{spans[0].trace_id}").json()
+    assert trace["status"] == "success"
+    assert trace["duration_ms"] >= 60
+
+
+def test_timestamps_are_truncated_to_the_microsecond():
+    # As a float of seconds this reading rounds up into the next second
+    assert _iso_utc(1_760_000_000_999_999_700) == "2025-10-09T08:53:20.999999"